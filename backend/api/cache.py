@@ -0,0 +1,158 @@
+# backend/api/cache.py
+"""
+Response cache for analyze().
+
+Entries are keyed on the *parsed* intent and its arguments plus the dataset
+version, so "Analyze Wakad", "analyze  wakad " and "ANALYZE WAKAD" share one
+entry and a reloaded dataset never serves stale results. Two tiers:
+
+* local -- in-process LRU of ``settings.ANALYZE_CACHE_SIZE`` entries. It holds
+  the result objects themselves: LocMemCache pickles on every store and
+  unpickles on every hit, which for large tables cost more than recomputing.
+  Callers copy payloads before changing them (``views.with_table_format``).
+* ``analyze_shared`` in ``settings.CACHES`` -- optional cross-worker tier
+  (e.g. FileBasedCache); local misses fall through to it and hits are copied
+  back locally.
+
+Payloads with tables larger than ``ANALYZE_CACHE_MAX_ROWS`` rows are not
+cached at all, which keeps a single broad query from evicting everything else.
+
+Misses go through :class:`~api.singleflight.SingleFlight`, so concurrent
+identical questions are computed once per worker and, with the shared tier,
+once across workers (``settings.ANALYZE_LOCK_DIR``).
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+from .encoding import Table
+from .singleflight import SingleFlight
+
+MAX_CACHED_ROWS = int(os.environ.get("ANALYZE_CACHE_MAX_ROWS", "5000"))
+
+
+def _get_cache(alias):
+    if alias not in settings.CACHES:
+        return None
+    try:
+        return caches[alias]
+    except InvalidCacheBackendError:
+        return None
+
+
+def _table_rows(payload):
+    return sum(len(v) for v in payload.values() if isinstance(v, Table))
+
+
+class LocalLRU:
+    """Bounded in-process LRU keeping values by reference (no pickling)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """Two-tier cache of ``(payload, status)`` results with hit/miss counters."""
+
+    def __init__(self, local_size=None, shared_alias="analyze_shared"):
+        if local_size is None:
+            local_size = getattr(settings, "ANALYZE_CACHE_SIZE", 256)
+        self.local = LocalLRU(local_size) if local_size > 0 else None
+        self.shared = _get_cache(shared_alias) if self.local is not None else None
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("local_hits", "shared_hits", "misses", "stores", "skipped"), 0)
+        # cross-worker locks only help when the result can be picked up from the shared tier
+        self.flights = SingleFlight(getattr(settings, "ANALYZE_LOCK_DIR", None) if self.shared is not None else None)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    @staticmethod
+    def make_key(dataset_version, intent, args):
+        raw = repr((dataset_version, intent, tuple(args)))
+        return "analyze:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        if self.local is None:
+            return None
+        result = self.local.get(key)
+        if result is not None:
+            self._count("local_hits")
+            return result
+        if self.shared is not None:
+            result = self.shared.get(key)
+            if result is not None:
+                self._count("shared_hits")
+                self.local.set(key, result)
+                return result
+        self._count("misses")
+        return None
+
+    def set(self, key, result):
+        if self.local is None:
+            return
+        payload, _ = result
+        if _table_rows(payload) > MAX_CACHED_ROWS:
+            self._count("skipped")
+            return
+        self.local.set(key, result)
+        if self.shared is not None:
+            self.shared.set(key, result)
+        self._count("stores")
+
+    def get_or_compute(self, key, compute):
+        result = self.get(key)
+        if result is None:
+            result = self.flights.do(key, lambda: self._compute(key, compute))
+        return result
+
+    def _compute(self, key, compute):
+        with self.flights.worker_lock(key) as waited:
+            # another worker held the lock: it has most likely just stored the answer
+            result = self.shared.get(key) if waited else None
+            if result is not None:
+                self.flights.count("worker_coalesced")
+                self.local.set(key, result)
+                return result
+            result = compute()
+            self.set(key, result)
+            return result
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["local_hits"] + counters["shared_hits"] + counters["misses"]
+        counters["hit_ratio"] = round((lookups - counters["misses"]) / lookups, 4) if lookups else None
+        counters["enabled"] = self.local is not None
+        counters["shared"] = self.shared is not None
+        counters["max_cached_rows"] = MAX_CACHED_ROWS
+        counters["singleflight"] = self.flights.stats()
+        return counters
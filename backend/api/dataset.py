@@ -0,0 +1,505 @@
+# backend/api/dataset.py
+"""
+Dataset loading and hot reload.
+
+A :class:`Dataset` bundles one loaded frame with everything derived from it
+(schema, location index, series store). It is never mutated: a reload builds
+a complete new bundle in the background and then swaps the manager's
+reference in one assignment. A request grabs ``manager.current()`` once and
+uses that bundle throughout, so it always sees a consistent snapshot even if
+a reload lands mid-request.
+
+Reloads are triggered by the file watcher (``DATASET_WATCH_INTERVAL``
+seconds between mtime checks; 0 disables it) or by ``POST /api/dataset/reload/``.
+
+``DATASET_PATH`` points at the source (.xlsx, .csv or .parquet; default: the
+bundled workbook) and ``DATASET_BACKEND`` picks how it is served:
+
+* ``memory`` (default) -- :class:`Dataset`, the whole frame in each worker
+* ``sqlite`` -- :class:`StoreDataset`, the source ingested in chunks into an
+  on-disk store (:mod:`api.store`); lookups and trends run as queries there,
+  so worker memory does not grow with the row count
+
+Handlers only use the methods both classes share (``index``, ``rows``,
+``places``, ``points``, ``aligned``, ``history``, ``has_years``); the export
+endpoint uses ``columns`` and ``row_chunks``.
+"""
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .encoding import json_values
+from .location_index import LocationIndex
+from .metrics import timed
+from .rollups import AGGREGATES, Rollups
+from .schema import DatasetSchema
+from .series import SeriesStore
+from .snapshot import load_with_snapshot
+from .sources import read_source
+from .store import open_store, quote
+
+logger = logging.getLogger(__name__)
+
+# Path setup
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # backend/api -> backend
+DATASET_DIR = os.path.join(BASE_DIR, "dataset")
+EXCEL_PATH = os.path.join(DATASET_DIR, "realestate.xlsx")  # put your file here
+DATASET_PATH = os.environ.get("DATASET_PATH") or EXCEL_PATH
+BACKEND = os.environ.get("DATASET_BACKEND", "memory")
+
+WATCH_INTERVAL = float(os.environ.get("DATASET_WATCH_INTERVAL", "10"))
+# warmup retries a failed first load after 1s, 2s, 4s, ... capped at the max
+RETRY_INITIAL = float(os.environ.get("DATASET_RETRY_INITIAL", "1"))
+RETRY_MAX = float(os.environ.get("DATASET_RETRY_MAX", "60"))
+
+
+# value kind of a column ("text", "int", "float", "bool", "datetime") by dtype kind / declared SQLite type
+_DTYPE_KINDS = {"i": "int", "u": "int", "f": "float", "b": "bool", "M": "datetime"}
+_SQL_KINDS = {"INTEGER": "int", "REAL": "float", "TIMESTAMP": "datetime", "DATETIME": "datetime", "DATE": "datetime"}
+
+
+def _dtype_kind(dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return _DTYPE_KINDS.get(dtype.kind, "text")
+
+
+def load_dataset(path=DATASET_PATH):
+    """Return (frame, source fingerprint) for the dataset file at ``path``."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset not found at {path}. Put the data file there.")
+    # reuse the columnar snapshot when the source hasn't changed
+    return load_with_snapshot(path, read_source)
+
+
+def _has_rollups(schema):
+    return bool(schema.year and schema.listing_column and any(schema.metrics[m] for m in AGGREGATES))
+
+
+def _aligned(labels, table):
+    """``{"years", "series"}`` from a (group x year) table: one value list per label on the shared year axis."""
+    table = table.reindex(index=range(len(labels))).sort_index(axis=1)
+    return {
+        "years": json_values(table.columns, int),
+        "series": {label: json_values(table.iloc[i].to_numpy(), float) for i, label in enumerate(labels)},
+    }
+
+
+class Dataset:
+    """One loaded frame plus its derived indexes. Treat as read-only."""
+
+    def __init__(self, frame, fingerprint, load_seconds):
+        self.frame = frame
+        self.fingerprint = fingerprint
+        # content hash prefix: identical across workers serving the same file
+        self.version = fingerprint["sha256"][:16]
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.schema = DatasetSchema.resolve(frame)
+        self.index = LocationIndex.build(frame, self.schema.search_columns)
+        self.series = SeriesStore.build(frame, self.index, self.schema.year, self.schema.metrics) if self.schema.year else None
+        self.rollups = (
+            Rollups.from_frame(frame, self.schema.listing_column, self.schema.year, self.schema.metrics)
+            if _has_rollups(self.schema) else None
+        )
+
+    @classmethod
+    def load(cls, path=DATASET_PATH):
+        start = time.perf_counter()
+        frame, fingerprint = load_dataset(path)
+        return cls(frame, fingerprint, time.perf_counter() - start)
+
+    @property
+    def has_years(self):
+        return self.series is not None
+
+    @timed("rows")
+    def rows(self, name_ids):
+        """Frame rows for the given location ids, in original order."""
+        return self.frame.take(self.index.positions_for(name_ids))
+
+    @property
+    def columns(self):
+        return list(self.frame.columns)
+
+    def column_kinds(self, columns=None):
+        """Value kind of each of ``columns`` (all by default), stable across row chunks."""
+        return {c: _dtype_kind(self.frame[c].dtype) for c in (columns or self.columns)}
+
+    def row_chunks(self, name_ids, columns=None, min_year=None, max_year=None, chunk_rows=1000):
+        """
+        Rows for the given location ids in original order, as frames of at
+        most ``chunk_rows`` rows, projected to ``columns`` and limited to
+        ``min_year..max_year``. Always yields at least one (possibly empty) frame.
+        """
+        positions = self.index.positions_for(name_ids)
+        if min_year is not None or max_year is not None:
+            years = self.frame[self.schema.year].to_numpy()[positions]
+            keep = np.ones(len(positions), dtype=bool)
+            if min_year is not None:
+                keep &= years >= min_year
+            if max_year is not None:
+                keep &= years <= max_year
+            positions = positions[keep]
+        # select the columns per chunk: projecting the whole frame first would copy it
+        cols = np.arange(len(self.frame.columns)) if columns is None else [self.frame.columns.get_loc(c) for c in columns]
+        for start in range(0, max(len(positions), 1), chunk_rows):
+            yield self.frame.iloc[positions[start:start + chunk_rows], cols]
+
+    def places(self):
+        """Sorted distinct values of the listing column."""
+        col = self.schema.listing_column
+        return sorted(self.frame[col].dropna().astype(str).unique().tolist()) if col else []
+
+    @timed("series")
+    def points(self, name_ids, metric):
+        """``[{"year", "value"}]`` of ``metric`` for the given locations, in year order."""
+        return self.series.points(self.series.order(name_ids), metric)
+
+    @timed("series")
+    def aligned(self, groups, metric):
+        """
+        ``metric`` summed per year for each ``(label, name_ids)`` group, on
+        the union of their years (``None`` where a group has no value), from
+        one groupby over the rows of all groups.
+        """
+        parts = [self.index.positions_for(ids) for _, ids in groups]
+        positions = np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+        frame = pd.DataFrame({
+            "group": np.repeat(np.arange(len(parts)), [len(p) for p in parts]),
+            "year": self.series.years[positions],
+            "value": self.series.values[metric][positions],
+        })
+        table = frame.groupby(["group", "year"])["value"].sum(min_count=1).unstack("year")
+        return _aligned([label for label, _ in groups], table)
+
+    @timed("series")
+    def history(self, name_ids, last_years=None, with_rows=False):
+        """
+        ``(chart, rows)``: the year-ordered price chart ``{"years", "prices"}``
+        for the given locations, limited to the last ``last_years`` years
+        present, plus the same rows as a frame when ``with_rows`` is set.
+        """
+        order = self.series.order(name_ids)
+        if last_years is not None:
+            # positions are already year-ordered, so "recent" is a mask over them
+            ordered_years = self.series.years[order]
+            order = order[ordered_years >= int(np.nanmax(ordered_years)) - last_years + 1]
+        prices = self.series.values.get("price")
+        chart = {
+            "years": json_values(self.series.years[order], float),
+            "prices": json_values(prices[order], float) if prices is not None else [None] * len(order),
+        }
+        return chart, (self.frame.take(order) if with_rows else None)
+
+    def find_location_rows(self, area_query):
+        """Case-insensitive contains on 'final location' or sensible fallbacks, else the closest fuzzy match."""
+        if not self.index.columns:
+            return pd.DataFrame()
+        # exact (contains) tier first, then the fuzzy fallback
+        return self.rows(self.index.resolve(area_query)[0])
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "rows": len(self.frame),
+            "columns": len(self.frame.columns),
+            "locations": len(self.index.names),
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+            "backend": "memory",
+        }
+
+
+class StoreDataset:
+    """
+    Dataset served from the on-disk store. Only the schema and the distinct
+    location names live in memory; rows are queried per request.
+    """
+
+    def __init__(self, store, fingerprint, load_seconds):
+        self.store = store
+        self.fingerprint = fingerprint
+        self.version = fingerprint["sha256"][:16]
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.schema = DatasetSchema.resolve(store.sample())
+        columns = self.schema.search_columns
+        self.index = LocationIndex.from_names(columns, {n for c in columns for n in store.distinct(c)})
+        schema = self.schema
+        self.rollups = Rollups.from_aggregates(store.yearly(schema.listing_column, schema.year, {
+            metric: ({"sum": "SUM", "mean": "AVG"}[how], schema.metrics[metric])
+            for metric, how in AGGREGATES.items() if schema.metrics[metric] is not None
+        })) if _has_rollups(schema) else None
+
+    @classmethod
+    def load(cls, path=DATASET_PATH, **store_options):
+        start = time.perf_counter()
+        # index the columns the schema will search, resolved from the first chunk
+        store, fingerprint = open_store(
+            path, lambda sample: DatasetSchema.resolve(sample).search_columns + ["year"], **store_options
+        )
+        return cls(store, fingerprint, time.perf_counter() - start)
+
+    @property
+    def has_years(self):
+        return self.schema.year is not None
+
+    def _matching(self, name_ids, **kwargs):
+        names = [self.index.names[i] for i in name_ids]
+        return self.store.matching(self.index.columns, names, **kwargs)
+
+    @timed("rows")
+    def rows(self, name_ids):
+        """Rows for the given location ids, in source order."""
+        return self._matching(name_ids)
+
+    def find_location_rows(self, area_query):
+        if not self.index.columns:
+            return pd.DataFrame()
+        return self.rows(self.index.resolve(area_query)[0])
+
+    @property
+    def columns(self):
+        return list(self.store.columns)
+
+    def column_kinds(self, columns=None):
+        # chunks are typed per chunk by pandas; the declared column types hold for all of them
+        declared = self.store.declared_types()
+        return {c: _SQL_KINDS.get(declared.get(c), "text") for c in (columns or self.columns)}
+
+    def row_chunks(self, name_ids, columns=None, min_year=None, max_year=None, chunk_rows=1000):
+        names = [self.index.names[i] for i in name_ids]
+        select = "*" if columns is None else ", ".join(quote(c) for c in columns)
+        yield from self.store.iter_matching(
+            self.index.columns, names, select=select, year=self.schema.year,
+            min_year=min_year, max_year=max_year, chunk_rows=chunk_rows,
+        )
+
+    def places(self):
+        col = self.schema.listing_column
+        return sorted(self.store.distinct(col)) if col else []
+
+    @timed("series")
+    def points(self, name_ids, metric):
+        year, col = self.schema.year, self.schema.metrics[metric]
+        frame = self._matching(name_ids, select=f"{quote(year)}, {quote(col)}", year=year)
+        years = json_values(frame.iloc[:, 0], int)
+        values = json_values(frame.iloc[:, 1], float)
+        return [{"year": y, "value": v} for y, v in zip(years, values)]
+
+    @timed("series")
+    def aligned(self, groups, metric):
+        names = [[self.index.names[i] for i in ids] for _, ids in groups]
+        frame = self.store.grouped_sums(self.index.columns, names, self.schema.year, self.schema.metrics[metric])
+        table = frame.set_index(["group", "year"])["value"].unstack("year")
+        return _aligned([label for label, _ in groups], table)
+
+    @timed("series")
+    def history(self, name_ids, last_years=None, with_rows=False):
+        year, price = self.schema.year, self.schema.price
+        min_year = None
+        if last_years is not None:
+            max_year = self.store.max_value(year, self.index.columns, [self.index.names[i] for i in name_ids])
+            min_year = None if max_year is None else int(max_year) - last_years + 1
+        select = "*" if with_rows else ", ".join(quote(c) for c in (year, price) if c)
+        frame = self._matching(name_ids, select=select, year=year, min_year=min_year)
+        chart = {
+            "years": json_values(frame[year], float),
+            "prices": json_values(frame[price], float) if price else [None] * len(frame),
+        }
+        return chart, (frame if with_rows else None)
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "rows": self.store.rows,
+            "columns": len(self.store.columns),
+            "locations": len(self.index.names),
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+            "backend": "sqlite",
+            "store": self.store.path,
+        }
+
+
+BACKENDS = {"memory": Dataset, "sqlite": StoreDataset}
+
+
+def open_dataset(path=DATASET_PATH, backend=BACKEND):
+    """Load ``path`` with the configured backend."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown DATASET_BACKEND '{backend}' (expected one of: {', '.join(BACKENDS)})")
+    return BACKENDS[backend].load(path)
+
+
+class DatasetManager:
+    """Holds the current dataset and swaps in reloaded ones atomically."""
+
+    def __init__(self, path=DATASET_PATH, backend=BACKEND):
+        self.path = path
+        self.backend = backend
+        self._current = None
+        self.load_error = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watch_interval = None
+        self._warmup = None
+        self._settled = threading.Event()
+        self._retry_delays = None
+        self.attempts = 0
+        self.warmup_started = None
+        self.ready_at = None
+        self.next_retry_at = None
+        # threads don't survive fork(): gunicorn --preload workers restart the watcher themselves
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._reload_lock = threading.Lock()
+        interval, self._watcher = self._watch_interval, None
+        if interval is not None:
+            self.start_watching(interval)
+        # a master that forked before its warmup succeeded: each worker keeps trying itself
+        delays, self._warmup, self._settled = self._retry_delays, None, threading.Event()
+        if delays is not None and self._current is None:
+            self.start_warmup(*delays)
+
+    def current(self):
+        return self._current
+
+    @property
+    def reloading(self):
+        return self._reload_lock.locked()
+
+    @property
+    def state(self):
+        """``ready``, ``warming`` (first load running) or ``retrying`` (a load failed, waiting for the next try)."""
+        if self._current is not None:
+            return "ready"
+        return "retrying" if self.next_retry_at is not None else "warming"
+
+    def start_warmup(self, initial_delay=RETRY_INITIAL, max_delay=RETRY_MAX):
+        """
+        Load the first dataset on a background thread so importing the app
+        doesn't wait for it. A failed load is retried with exponential
+        backoff until one succeeds.
+        """
+        if self._current is not None or self._warmup is not None:
+            return self._warmup
+        self._retry_delays = (initial_delay, max_delay)
+        self.warmup_started = time.time()
+
+        def warm():
+            delay = initial_delay
+            while True:
+                if self.reload() is None:
+                    # the watcher or the reload endpoint is already loading: wait for it and
+                    # try again ourselves if it didn't bring a dataset, rather than count a failure
+                    with self._reload_lock:
+                        pass
+                    if self._current is None:
+                        continue
+                    break
+                self.attempts += 1
+                if self._current is not None:
+                    break
+                self._settled.set()
+                self.next_retry_at = time.time() + delay
+                logger.warning("Dataset warmup attempt %d failed; retrying in %.1fs", self.attempts, delay)
+                time.sleep(delay)
+                delay = min(delay * 2, max_delay)
+            self.next_retry_at = None
+            self.ready_at = time.time()
+            self._settled.set()
+
+        self._warmup = threading.Thread(target=warm, name="dataset-warmup", daemon=True)
+        self._warmup.start()
+        return self._warmup
+
+    def wait_ready(self, timeout=None):
+        """
+        Block until the warmup's first attempt is over (or ``timeout``
+        passes); returns whether a dataset is live. A failed attempt ends the
+        wait while the warmup keeps retrying in the background.
+        """
+        if self._warmup is not None:
+            self._settled.wait(timeout)
+        return self._current is not None
+
+    def readiness(self):
+        """Warmup progress for the readiness endpoint."""
+        out = {"state": self.state, "attempts": self.attempts, "last_error": self.load_error}
+        if self.warmup_started is not None and self.ready_at is not None:
+            out["warmup_seconds"] = round(self.ready_at - self.warmup_started, 4)
+        if self.next_retry_at is not None:
+            out["retry_in_seconds"] = round(max(self.next_retry_at - time.time(), 0), 1)
+        return out
+
+    def _source_stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def reload(self, force=False):
+        """
+        Build a new Dataset and swap it in; returns True if a new version went
+        live, False if the load failed or found the same content, and None if
+        another reload was already running (this call did nothing).
+
+        Without ``force`` an unchanged source (same content hash) is left alone.
+        Concurrent calls collapse into the one already running. A failed reload
+        keeps serving the previous dataset.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return None
+        try:
+            current = self._current
+            try:
+                fresh = open_dataset(self.path, self.backend)
+            except Exception as e:
+                self.load_error = str(e)
+                logger.exception("Dataset reload failed; keeping version %s", current and current.version)
+                return False
+            self.load_error = None
+            if not force and current is not None and current.version == fresh.version:
+                return False
+            self._current = fresh
+            logger.info("Dataset version %s live (%d rows)", fresh.version, fresh.describe()["rows"])
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def reload_in_background(self, force=False):
+        thread = threading.Thread(target=self.reload, kwargs={"force": force}, name="dataset-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def start_watching(self, interval=WATCH_INTERVAL):
+        """Poll the source file and reload when its mtime or size changes."""
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._watch_interval = interval
+
+        def watch():
+            last = self._source_stat()
+            while True:
+                time.sleep(interval)
+                stat = self._source_stat()
+                if stat is not None and stat != last:
+                    # retried next tick when the load failed (e.g. file still being written)
+                    # or another reload was running, which may have read the file before this change
+                    if self.reload() is not None and self.load_error is None:
+                        last = stat
+
+        self._watcher = threading.Thread(target=watch, name="dataset-watch", daemon=True)
+        self._watcher.start()
+
+
+manager = DatasetManager()
@@ -0,0 +1,78 @@
+# backend/api/encoding.py
+"""
+Vectorized conversion of frame data to JSON-ready Python values.
+
+``make_json_safe_series`` and ``to_dict(orient="records")`` visited every
+cell in Python (``pd.isna``/``isinstance`` per value). Here each column is
+converted with one NumPy pass -- NaN/NaT -> None, datetimes -> ISO strings,
+numpy scalars -> native ints/floats -- and tables are only materialized when
+the renderer asks for them.
+"""
+import numpy as np
+import pandas as pd
+
+TABLE_FORMATS = ("records", "columns")
+
+
+def json_values(values, cast=None):
+    """
+    List of JSON-safe values for a 1-d array or Series.
+
+    ``cast`` (``int`` or ``float``) coerces numeric values, e.g. years to
+    float for chart axes; missing values always become ``None``.
+    """
+    arr = values.to_numpy() if isinstance(values, (pd.Series, pd.Index)) else np.asarray(values)
+    kind = arr.dtype.kind
+
+    if kind == "M":
+        out = np.datetime_as_string(arr, unit="s").astype(object)
+        out[np.isnat(arr)] = None
+        return out.tolist()
+
+    if kind in "biuf":
+        target = {int: np.int64, float: np.float64}.get(cast)
+        missing = np.isnan(arr) if kind == "f" else None
+        if missing is not None and missing.any():
+            filled = np.where(missing, 0, arr)
+            out = (filled.astype(target) if target else filled).astype(object)
+            out[missing] = None
+            return out.tolist()
+        return (arr.astype(target) if target else arr).tolist()
+
+    out = arr.astype(object)
+    missing = pd.isna(out)
+    if cast is not None:
+        return [None if m else cast(v) for v, m in zip(out.tolist(), missing.tolist())]
+    out[missing] = None
+    return out.tolist()
+
+
+class Table:
+    """
+    Tabular payload, encoded lazily by the renderer.
+
+    ``records`` keeps the historical list-of-row-dicts shape; ``columns`` is
+    ``{"columns": [...names], "data": [[...col 0], [...col 1], ...], "rows": n}``
+    which skips building one dict per row on both ends.
+    """
+
+    def __init__(self, frame, table_format="records"):
+        self.frame = frame
+        self.table_format = table_format if table_format in TABLE_FORMATS else "records"
+
+    def __len__(self):
+        return len(self.frame)
+
+    def slice(self, offset, limit):
+        """The rows ``offset:offset + limit`` as a table of the same format."""
+        return Table(self.frame.iloc[offset:offset + limit], self.table_format)
+
+    def column_lists(self):
+        return [json_values(self.frame[c]) for c in self.frame.columns]
+
+    def encode(self):
+        names = [str(c) for c in self.frame.columns]
+        data = self.column_lists()
+        if self.table_format == "columns":
+            return {"columns": names, "data": data, "rows": len(self.frame)}
+        return [dict(zip(names, row)) for row in zip(*data)]
@@ -0,0 +1,154 @@
+# backend/api/export.py
+"""
+Bulk export of matching rows (``GET /api/export/``).
+
+Rows come from the dataset in chunks of ``EXPORT_CHUNK_ROWS``
+(``row_chunks`` on either backend) and each chunk is written straight from
+its columns into the response -- pandas' CSV writer, or Arrow record batches
+for Arrow IPC / Parquet -- so no per-row Python objects are built and memory
+stays at about one chunk however many rows match.
+
+Formats: ``csv`` (default), ``arrow`` (IPC stream) and ``parquet`` (one row
+group per chunk); the binary ones need ``pyarrow`` (in requirements.txt; a
+server without it answers them with 501).
+
+The Arrow schema comes from the dataset's column kinds (frame dtypes, or the
+declared SQLite column types) rather than from the first chunk: the sqlite
+backend infers dtypes per chunk, so a column that is all-NULL or int in one
+chunk may be float in the next. Every chunk is converted to that schema.
+"""
+import io
+import os
+
+import pandas as pd
+
+CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "65536"))
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportError(Exception):
+    """Invalid export request; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Arrow and Parquet exports require the 'pyarrow' package on the server", status=501)
+    return pa, pq
+
+
+def _year(params, key):
+    value = params.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ExportError(f"'{key}' must be a year")
+
+
+def export_options(params, ds):
+    """``(format, columns, min_year, max_year)`` from the query parameters, validated against ``ds``."""
+    fmt = params.get("format", "csv")
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format '{fmt}'; use one of {', '.join(FORMATS)}")
+    if fmt != "csv":
+        _pyarrow()
+
+    columns = [c.strip() for value in params.getlist("columns") for c in value.split(",") if c.strip()] or None
+    if columns is not None:
+        unknown = [c for c in columns if c not in ds.columns]
+        if unknown:
+            raise ExportError(f"Unknown columns: {', '.join(unknown)}")
+
+    min_year, max_year = _year(params, "from_year"), _year(params, "to_year")
+    if (min_year is not None or max_year is not None) and not ds.has_years:
+        raise ExportError("Dataset has no 'year' column to filter on")
+    return fmt, columns, min_year, max_year
+
+
+def _csv(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_types(pa):
+    return {"text": pa.string(), "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(), "datetime": pa.timestamp("ns")}
+
+
+def _conform(chunk, kinds):
+    """``chunk`` with each column converted to its kind, whatever dtype it was read with."""
+    out = {}
+    for name, kind in kinds.items():
+        column = chunk[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.astype(object)
+        if kind == "text":
+            column = column.astype("string")
+        elif kind == "int":
+            column = pd.to_numeric(column).astype("Int64")
+        elif kind == "float":
+            column = pd.to_numeric(column).astype("float64")
+        elif kind == "bool":
+            column = column.astype("boolean")
+        else:
+            column = pd.to_datetime(column)
+        out[str(name)] = column
+    return pd.DataFrame(out)
+
+
+def _arrow(chunks, kinds, parquet):
+    pa, pq = _pyarrow()
+    types = _arrow_types(pa)
+    schema = pa.schema([pa.field(str(name), types[kind]) for name, kind in kinds.items()])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema) if parquet else pa.ipc.new_stream(sink, schema)
+    for chunk in chunks:
+        writer.write_table(pa.Table.from_pandas(_conform(chunk, kinds), schema=schema, preserve_index=False))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def encode(chunks, fmt, kinds=None):
+    """Response body chunks for the row ``chunks`` in ``fmt``; Arrow formats need the column ``kinds``."""
+    if fmt == "csv":
+        return _csv(chunks)
+    return _arrow(chunks, kinds, parquet=fmt == "parquet")
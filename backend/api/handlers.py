@@ -0,0 +1,277 @@
+# backend/api/handlers.py
+"""
+Intent handlers for analyze().
+
+Each handler receives the dataset snapshot the request started with
+(:class:`~api.dataset.Dataset` or :class:`~api.dataset.StoreDataset`), plus
+the arguments parsed by :mod:`api.intents`, and returns ``(payload, status)``.
+Payload tables are :class:`~api.encoding.Table` objects; the view picks their
+format at render time.
+
+Areas are resolved with ``ds.index.resolve``: when nothing contains the text,
+a close fuzzy match is used instead and reported under ``corrections``; when
+there is none, the 404 lists ``did_you_mean`` candidates.
+
+Compare intents take any number of areas (up to ``MAX_COMPARE_AREAS``) and
+also return ``aligned``: one value per year for every area on a shared year
+axis, so the chart can plot them together.
+"""
+import pandas as pd
+
+from . import intents
+from .encoding import Table, json_values
+
+# series per compare answer; each one is a line on the chart
+MAX_COMPARE_AREAS = 12
+
+
+def _locate(ds, area, corrections):
+    """``(ids, label)`` for ``area``; fuzzy matches are labelled with the matched name and recorded."""
+    ids, fuzzy = ds.index.resolve(area)
+    if fuzzy is None:
+        return ids, area
+    name_id, score = fuzzy
+    name = ds.index.names[name_id]
+    corrections.append({"query": area, "location": name, "score": score})
+    return ids, name
+
+
+def _not_found(ds, error, *areas):
+    payload = {"error": error}
+    suggestions = list(dict.fromkeys(s for area in areas for s in ds.index.suggestions(area)))
+    if suggestions:
+        payload["did_you_mean"] = suggestions
+    return payload, 404
+
+
+def _found(payload, corrections):
+    if corrections:
+        payload["corrections"] = corrections
+    return payload, 200
+
+
+@intents.register("list")
+def list_places(ds):
+    uniq = ds.places()
+    return {"summary": f"Total {len(uniq)} locations found.", "places": uniq}, 200
+
+
+@intents.register("help", needs_data=False)
+def show_help(ds):
+    examples = [
+        "Analyze Wakad",
+        "List places",
+        "Compare Ambegaon Budruk and Aundh",
+        "Compare Wakad and Hinjewadi demand",
+        "Show price growth for Akurdi over last 3 years",
+        "Show demand trend for Hinjewadi",
+        "Top 10 areas by price growth",
+        "Highest demand in 2023",
+        "YoY change for Aundh",
+    ]
+    return {"summary": "You can ask examples:", "examples": examples}, 200
+
+
+def _locate_all(ds, areas, corrections):
+    """
+    ``[(ids, label)]`` per distinct label plus the labels that matched
+    nothing. Repeats, including a misspelling corrected to an area already
+    listed, are dropped: they would collapse into one series key.
+    """
+    located = {}
+    for area in dict.fromkeys(areas):
+        ids, label = _locate(ds, area, corrections)
+        located.setdefault(label.casefold(), (ids, label))
+    located = list(located.values())
+    return located, [label for ids, label in located if not ids]
+
+
+def _listing(labels):
+    return labels[0] if len(labels) == 1 else f"{', '.join(labels[:-1])} and {labels[-1]}"
+
+
+def _quoted(labels, sep):
+    return sep.join(f"'{label}'" for label in labels)
+
+
+@intents.register("demand_compare")
+def demand_compare(ds, *parts):
+    if len(parts) < 2:
+        return {"error": "Could not parse the two locations to compare"}, 400
+    if len(parts) > MAX_COMPARE_AREAS:
+        return {"error": f"Compare at most {MAX_COMPARE_AREAS} locations at once"}, 400
+
+    corrections = []
+    located, missing = _locate_all(ds, parts, corrections)
+    labels = [label for _, label in located]
+    if missing:
+        return _not_found(ds, f"Cannot find data for {_quoted(labels, ' or ')}", *missing)
+    if len(located) < 2:
+        return {"error": "Name at least two different locations to compare"}, 400
+
+    if ds.schema.demand is None:
+        return {"error": "No numeric demand-like column found for one or both locations"}, 500
+
+    if not ds.has_years:
+        return {"error": "Dataset missing 'year' column for comparison"}, 500
+
+    return _found({
+        "summary": f"Demand comparison between {_listing(labels)}.",
+        "demand_compare": {label: ds.points(ids, "demand") for ids, label in located},
+        "aligned": ds.aligned([(label, ids) for ids, label in located], "demand"),
+    }, corrections)
+
+
+@intents.register("compare")
+def compare(ds, *areas):
+    if len(areas) > MAX_COMPARE_AREAS:
+        return {"error": f"Compare at most {MAX_COMPARE_AREAS} locations at once"}, 400
+
+    corrections = []
+    located, missing = _locate_all(ds, areas, corrections)
+    labels = [label for _, label in located]
+    if missing:
+        which = "both" if len(areas) == 2 else "more"
+        return _not_found(ds, f"One or {which} locations not found: {_quoted(labels, ', ')}", *missing)
+    if len(located) < 2:
+        return {"error": "Name at least two different locations to compare"}, 400
+
+    col = ds.schema.compare
+    payload = {"summary": f"Comparison for {_quoted(labels, ' vs ')} (column used: {col})"}
+    if col and ds.has_years:
+        payload["compare"] = {label: ds.points(ids, "compare") for ids, label in located}
+        payload["aligned"] = ds.aligned([(label, ids) for ids, label in located], "compare")
+    else:
+        # fallback: head rows as records
+        payload["compare"] = {label: Table(ds.rows(ids).head(10)) for ids, label in located}
+    return _found(payload, corrections)
+
+
+@intents.register("demand_trend")
+def demand_trend(ds, area):
+    if not area:
+        return {"error": "Cannot detect area for demand trend"}, 400
+
+    corrections = []
+    ids, area = _locate(ds, area, corrections)
+    if not ids:
+        return _not_found(ds, f"No data found for {area}", area)
+
+    if ds.schema.demand is None:
+        return {"error": "No numeric demand-related column found"}, 500
+
+    if not ds.has_years:
+        return {"error": "Dataset missing 'year' column"}, 500
+
+    return _found({
+        "summary": f"Demand trend for {area} using column '{ds.schema.demand}'.",
+        "demand": ds.points(ids, "demand")
+    }, corrections)
+
+
+@intents.register("price_growth")
+def price_growth(ds, area, years):
+    if not area:
+        return {"error": "Could not determine area from query"}, 400
+
+    corrections = []
+    ids, area = _locate(ds, area, corrections)
+    if not ids:
+        return _not_found(ds, f"No data found for {area}", area)
+    if not ds.has_years:
+        return {"error": "Dataset has no 'year' column to compute last years"}, 500
+
+    chart, recent = ds.history(ids, last_years=years, with_rows=True)
+
+    return _found({
+        "summary": f"Showing last {years} years price growth for {area}",
+        "chart": chart,
+        "table": Table(recent)
+    }, corrections)
+
+
+@intents.register("analyze")
+def analyze_area(ds, area):
+    if not area:
+        return {"error": "Could not determine area from query"}, 400
+
+    corrections = []
+    ids, area = _locate(ds, area, corrections)
+    if not ids:
+        return _not_found(ds, f"No data found for {area}", area)
+    rows = ds.rows(ids)
+
+    if ds.has_years and ds.schema.price:
+        chart, _ = ds.history(ids)
+    else:
+        chart = {"years": json_values(rows["year"], float) if "year" in rows.columns else [], "prices": []}
+
+    return _found({
+        "summary": f"Here is a quick analysis for {area}. Found {len(rows)} matching records.",
+        "chart": chart,
+        "table": Table(rows)
+    }, corrections)
+
+
+def _percent(value):
+    return "n/a" if value is None else f"{value:.1f}%"
+
+
+@intents.register("rank")
+def rank_areas(ds, metric, measure, n, ascending, year):
+    if n < 1:
+        return {"error": "Ask for at least 1 area (e.g. 'top 5 areas by demand')"}, 400
+    rollups = ds.rollups
+    if rollups is None or metric not in rollups.values:
+        return {"error": f"Dataset has no yearly {metric} data to rank"}, 500
+
+    if measure == "cagr":
+        period = f" ({rollups.years[0]}-{rollups.years[-1]})"
+    else:
+        year = rollups.latest_year() if year is None else year
+        if year not in rollups.years:
+            return {"error": f"No data for {year}"}, 404
+        period = f" in {year}"
+
+    label = {"value": metric, "yoy": f"{metric} YoY change", "cagr": f"{metric} CAGR"}[measure]
+    top = rollups.top(metric, measure, year, n, ascending)
+    if not top:
+        return {"error": f"No {label} data{period}"}, 404
+
+    column = {"value": metric, "yoy": f"{metric} yoy %", "cagr": f"{metric} cagr %"}[measure]
+    used = f"(column used: {ds.schema.metrics[metric]})"
+    if n == 1:
+        _, location, value = top[0]
+        shown = _percent(value) if measure != "value" else f"{value:,.2f}"
+        summary = f"{'Lowest' if ascending else 'Highest'} {label}{period}: {location} ({shown}) {used}"
+    else:
+        summary = f"{'Bottom' if ascending else 'Top'} {len(top)} areas by {label}{period} {used}"
+    return {"summary": summary, "table": Table(pd.DataFrame(top, columns=["rank", "location", column]))}, 200
+
+
+@intents.register("yoy")
+def yoy_change(ds, area):
+    if not area:
+        return {"error": "Cannot detect area for YoY change"}, 400
+    rollups = ds.rollups
+    if rollups is None:
+        return {"error": "Dataset has no yearly data for YoY change"}, 500
+
+    corrections = []
+    ids, area = _locate(ds, area, corrections)
+    names = [n for n in (ds.index.names[i] for i in ids) if rollups.position(n) is not None]
+    if not names:
+        return _not_found(ds, f"No data found for {area}", area)
+
+    table = pd.concat([rollups.history(n).assign(location=n) for n in names], ignore_index=True)
+    table = table[["location"] + [c for c in table.columns if c != "location"]]
+    cagr = {
+        n: {m: json_values(rollups.cagr[m][[rollups.position(n)]], float)[0] for m in rollups.values}
+        for n in names
+    }
+    if len(names) == 1:
+        growth = ", ".join(f"{m} CAGR {_percent(v)}" for m, v in cagr[names[0]].items())
+        summary = f"YoY change for {names[0]} ({growth})."
+    else:
+        summary = f"YoY change for {len(names)} locations matching '{area}'."
+    return _found({"summary": summary, "cagr": cagr, "table": Table(table)}, corrections)
@@ -0,0 +1,85 @@
+# backend/api/http_cache.py
+"""
+Cacheable GET form of analyze().
+
+``GET /api/analyze/?q=Analyze+Wakad[&table_format=columns][&limit=20][&offset=0][&columns=year,total+units]``
+answers exactly like the POST body with the same keys. Every question has one
+canonical URL: ``q`` normalized like the intent parser sees it, defaults
+dropped, numbers and columns spelled one way, keys sorted. Other spellings
+are redirected (301) there, so browsers and proxies keep a single entry per
+question.
+
+Responses carry validators derived from the dataset: ``ETag`` (dataset
+version + canonical query) and ``Last-Modified`` (source file mtime), plus
+``Cache-Control: public, max-age=ANALYZE_HTTP_MAX_AGE``. A conditional
+request that still matches gets a 304 before the query is parsed or run.
+"""
+import hashlib
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .intents import normalize
+
+
+def _integer(value):
+    try:
+        return str(int(value))
+    except (TypeError, ValueError):
+        # left as sent; page_options rejects it with a 400
+        return value
+
+
+def canonical_params(params):
+    """``(body, canonical query string)`` for GET ``params`` (a QueryDict)."""
+    body, canonical = {}, {}
+    query = params.get("q", params.get("query", ""))
+    body["query"] = query
+    canonical["q"] = normalize(query)
+
+    table_format = params.get("table_format", "records")
+    body["table_format"] = table_format
+    if table_format != "records":
+        canonical["table_format"] = table_format
+
+    for key in ("limit", "offset"):
+        value = params.get(key)
+        if value not in (None, ""):
+            body[key] = canonical[key] = _integer(value)
+
+    columns = [c.strip() for value in params.getlist("columns") for c in value.split(",") if c.strip()]
+    if columns:
+        body["columns"] = columns
+        canonical["columns"] = ",".join(columns)
+
+    for flag in ("stream", "profile"):
+        if params.get(flag) in ("1", "true"):
+            canonical[flag] = "1"
+    if "stream" in canonical:
+        body["stream"] = True
+    return body, urlencode(sorted(canonical.items()), quote_via=quote)
+
+
+def validators(ds, canonical):
+    """``(etag, last_modified)`` of the answer to ``canonical`` from dataset ``ds``."""
+    digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+    mtime_ns = ds.fingerprint.get("mtime_ns")
+    return f'"{ds.version}-{digest}"', (mtime_ns // 10**9 if mtime_ns else None)
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response when the request's validators still match, else ``None``."""
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def add_validators(response, etag, last_modified, cacheable=True):
+    if not cacheable:
+        patch_cache_control(response, no_store=True)
+        return response
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=settings.ANALYZE_HTTP_MAX_AGE)
+    return response
@@ -0,0 +1,182 @@
+# backend/api/intents.py
+"""
+Query parsing and intent dispatch for analyze().
+
+The old dispatcher tested a chain of ``in`` substrings and cut arguments out
+with ``str.replace``, which also cut keywords out of place names ("for" in
+"Fortune Heights", "show" in "Showroom Lane"). Here one precompiled keyword
+pattern classifies the query and whole-word patterns extract the arguments,
+so parsing is a fixed handful of regex passes per query.
+
+Handlers register themselves with ``@register("<intent>")`` and are called
+as ``handler(dataset, *intent.args)``; they validate the arguments themselves.
+Handlers registered with ``needs_data=False`` never touch the dataset and are
+answered (with ``dataset=None``) while a worker is still warming up.
+"""
+import re
+from collections import namedtuple
+
+from .metrics import timed
+
+Intent = namedtuple("Intent", ["name", "args"])
+
+HELP_QUERIES = ("help", "options", "what can you do")
+DEFAULT_YEARS = 3
+
+_KEYWORDS = re.compile(r"\b(list|places|locations|compare|demand|trend|show|last|years?|price|growth)\b")
+_SPACES = re.compile(r"\s+")
+_TRAILING = re.compile(r"[\s?!.,;:]+$")
+# "a and b", "a, b", "a, b, and c"
+_LIST_SEP = re.compile(r"\s*,\s*(?:and\s+)?|\s+and\s+")
+_LAST_N_YEARS = re.compile(r"\blast\s+(\d+)\s+years?\b")
+_ANALYZE = re.compile(r"^analyze\b")
+# "top 10 areas by price growth", "highest demand in 2023", "lowest 5 price yoy"
+_RANK = re.compile(r"\b(top|bottom|highest|lowest)\b(?:\s+(\d+))?")
+_RANK_METRIC = re.compile(r"\b(prices?|rates?|demand|units|growth|cagr|yoy)\b")
+# "... for <area>": the query names a place, so top/highest may be part of it
+_FOR_AREA = re.compile(r"\bfor\s+\S")
+_YOY = re.compile(r"\b(?:yoy|cagr|year[- ](?:over|on)[- ]year)\b")
+_YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+_DEMAND = re.compile(r"\b(?:demand|units)\b")
+
+# words stripped from the query to leave the area name, per intent
+_COMPARE_WORDS = re.compile(r"\b(?:compare|demand)\b")
+_TREND_WORDS = re.compile(r"\b(?:show|demand|trend|for|of|the|in)\b")
+_GROWTH_WORDS = re.compile(r"\b(?:show|price|growth|for|over|last|years?|the|in)\b")
+_YOY_WORDS = re.compile(r"\b(?:show|yoy|cagr|year[- ](?:over|on)[- ]year|change|growth|price|demand|for|of|in|the)\b")
+
+# (query, intent name, args): the README queries and the parser edge cases,
+# shared by the parser tests and ``manage.py bench_parser``
+EXAMPLES = [
+    ("Analyze Wakad", "analyze", ("wakad",)),
+    ("List places", "list", ()),
+    ("list locations", "list", ()),
+    ("help", "help", ()),
+    ("What else can you do?", "help", ()),
+    ("Compare Aundh and Baner", "compare", ("aundh", "baner")),
+    ("Compare Ambegaon Budruk and Aundh", "compare", ("ambegaon budruk", "aundh")),
+    ("Compare Wakad and Hinjewadi demand", "demand_compare", ("wakad", "hinjewadi")),
+    ("Compare Aundh, Baner, and Wakad", "compare", ("aundh", "baner", "wakad")),
+    ("compare wakad, aundh and akurdi demand", "demand_compare", ("wakad", "aundh", "akurdi")),
+    ("Show price growth for Akurdi over last 3 years", "price_growth", ("akurdi", 3)),
+    ("show price growth for wakad over the last 2 years", "price_growth", ("wakad", 2)),
+    ("Show demand trend for Hinjewadi", "demand_trend", ("hinjewadi",)),
+    ("Show demand trend for Shivajinagar", "demand_trend", ("shivajinagar",)),
+    ("Show demand trend for Fortune Heights", "demand_trend", ("fortune heights",)),
+    ("Show price growth for Showroom Lane over last 5 years", "price_growth", ("showroom lane", 5)),
+    ("Analyze   Aundh?", "analyze", ("aundh",)),
+    ("Top 10 areas by price growth", "rank", ("price", "cagr", 10, False, None)),
+    ("Highest demand in 2023", "rank", ("demand", "value", 1, False, 2023)),
+    ("bottom 3 areas by demand yoy", "rank", ("demand", "yoy", 3, True, None)),
+    ("YoY change for Baner", "yoy", ("baner",)),
+    ("Show demand trend for Top Heights", "demand_trend", ("top heights",)),
+    ("YoY change for Highest Point", "yoy", ("highest point",)),
+    ("Show price growth for Bottom Lane over last 4 years", "price_growth", ("bottom lane", 4)),
+    ("tell me about wakad", "analyze", ("wakad",)),
+    ("analyze", "analyze", ("",)),
+]
+
+_handlers = {}
+_data_free = set()
+
+
+def register(name, needs_data=True):
+    """Decorator registering the handler for intent ``name``."""
+    def decorator(fn):
+        _handlers[name] = fn
+        if not needs_data:
+            _data_free.add(name)
+        return fn
+    return decorator
+
+
+def needs_data(name):
+    return name not in _data_free
+
+
+def handler_for(name):
+    return _handlers[name]
+
+
+def registered():
+    return _handlers.keys()
+
+
+@timed("handler")
+def dispatch(intent, dataset):
+    """Run the registered handler for ``intent`` against ``dataset``; returns ``(payload, status)``."""
+    return _handlers[intent.name](dataset, *intent.args)
+
+
+def normalize(query):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return _TRAILING.sub("", _SPACES.sub(" ", query.strip().lower()))
+
+
+def _area(pattern, text):
+    return _SPACES.sub(" ", pattern.sub(" ", text)).strip()
+
+
+def _rank_args(query, match):
+    """``(metric, measure, n, ascending, year)`` for a ranking query."""
+    word, count = match.groups()
+    metric = "demand" if _DEMAND.search(query) else "price"
+    year = _YEAR.search(query)
+    year = int(year.group(1)) if year else None
+    if _YOY.search(query) and "cagr" not in query:
+        measure = "yoy"
+    elif "growth" in query or "cagr" in query:
+        # growth over the whole range, or within one year when a year is named
+        measure = "yoy" if year is not None else "cagr"
+    else:
+        measure = "value"
+    n = int(count) if count else (10 if word in ("top", "bottom") else 1)
+    return metric, measure, n, word in ("bottom", "lowest"), year
+
+
+def parse(query):
+    """Parse a raw query into an :class:`Intent`; precedence follows the original dispatcher."""
+    query = normalize(query)
+    words = set(_KEYWORDS.findall(query))
+
+    # --- list places ---
+    if "list" in words and ("places" in words or "locations" in words):
+        return Intent("list", ())
+
+    # --- help / what else ---
+    if "what else" in query or query in HELP_QUERIES:
+        return Intent("help", ())
+
+    # --- compare X, Y and Z (demand compare first: it is the more specific ask) ---
+    if "compare" in words and _LIST_SEP.search(query):
+        parts = [p for p in (_area(_COMPARE_WORDS, part) for part in _LIST_SEP.split(query)) if p]
+        if "demand" in words:
+            return Intent("demand_compare", tuple(parts))
+        if len(parts) >= 2:
+            return Intent("compare", tuple(parts))
+
+    # --- top / bottom N areas by a yearly metric ---
+    # (not for a named area or a trend/growth ask: "demand trend for Top Heights")
+    rank = _RANK.search(query)
+    if (rank and _RANK_METRIC.search(query) and not _ANALYZE.match(query)
+            and not _FOR_AREA.search(query) and "trend" not in words and not _LAST_N_YEARS.search(query)):
+        return Intent("rank", _rank_args(query, rank))
+
+    # --- YoY change / CAGR for <area> ---
+    if _YOY.search(query):
+        return Intent("yoy", (_area(_YOY_WORDS, query),))
+
+    # --- show demand trend for <area> ---
+    if ("demand" in words and "trend" in words) or ("show" in words and "demand" in words):
+        return Intent("demand_trend", (_area(_TREND_WORDS, query),))
+
+    # --- show price growth for <area> over last N years ---
+    if "last" in words and ("year" in words or "years" in words):
+        m = _LAST_N_YEARS.search(query)
+        years = int(m.group(1)) if m else DEFAULT_YEARS
+        return Intent("price_growth", (_area(_GROWTH_WORDS, _LAST_N_YEARS.sub(" ", query)), years))
+
+    # --- default: analyze <area> ---
+    if _ANALYZE.match(query):
+        return Intent("analyze", (_area(_ANALYZE, query),))
+    return Intent("analyze", (query.split()[-1] if query else "",))
@@ -0,0 +1,174 @@
+# backend/api/location_index.py
+"""
+Location index built once per dataset load.
+
+``find_location_rows`` used to run ``str.contains`` over every row on every
+request. The index instead keeps each distinct location string once, with the
+positions of the rows that hold it, and a trigram table over the lowercased
+names so a "contains" lookup only verifies the few names that share all of the
+query's trigrams. Lookups scale with the number of distinct names, never with
+the number of rows.
+
+Matching mirrors ``Series.astype(str).str.contains(query, case=False)``: plain
+queries are case-insensitive substrings, and queries with regex syntax are
+evaluated as a case-insensitive regex against each distinct name.
+
+When nothing contains the query, :meth:`LocationIndex.resolve` falls back to
+a fuzzy tier for misspellings ("wakkad", "hinjawadi"). A second trigram table
+over padded names ranks every name sharing a trigram with the query by Dice
+similarity (``2 * shared / (grams(query) + grams(name))``). The best name is
+accepted above ``LOCATION_FUZZY_ACCEPT``; weaker candidates are only offered
+as suggestions.
+"""
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from .metrics import timed
+
+_REGEX_CHARS = frozenset(".^$*+?{}[]\\|()")
+_EMPTY = np.empty(0, dtype=np.intp)
+MATCH_CACHE_SIZE = 4096
+FUZZY_ACCEPT = float(os.environ.get("LOCATION_FUZZY_ACCEPT", "0.5"))
+FUZZY_SUGGEST = 0.3
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _padded_trigrams(text):
+    # pg_trgm-style padding so word starts/ends (and short names) carry weight
+    return _trigrams("  " + " ".join(text.split()) + " ")
+
+
+class LocationIndex:
+    """Distinct location names -> row positions, with a trigram table for substring lookups."""
+
+    def __init__(self, columns, names, positions):
+        self.columns = columns
+        self.names = names
+        self._lower = [n.lower() for n in names]
+        self._positions = positions
+        # area string -> matched ids; repeated areas (batches, compares) resolve once
+        self._matches = {}
+        self._resolved = {}
+        self._grams = {}
+        self._fuzzy_grams = {}
+        self._fuzzy_sizes = []
+        for name_id, lname in enumerate(self._lower):
+            for gram in _trigrams(lname):
+                self._grams.setdefault(gram, []).append(name_id)
+            padded = _padded_trigrams(lname)
+            self._fuzzy_sizes.append(len(padded))
+            for gram in padded:
+                self._fuzzy_grams.setdefault(gram, []).append(name_id)
+
+    @classmethod
+    def build(cls, frame, columns):
+        """Index ``columns`` (the schema's search columns) of ``frame``."""
+        by_name = {}
+        for col in columns:
+            # astype(str) so NaN indexes as "nan", exactly like the old str.contains scan
+            values = frame[col].astype(str).to_numpy()
+            uniques, inverse = np.unique(values, return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.cumsum(np.bincount(inverse, minlength=len(uniques)))[:-1]
+            for name, pos in zip(uniques.tolist(), np.split(order, bounds)):
+                by_name.setdefault(name, []).append(pos)
+
+        names = sorted(by_name)
+        positions = [
+            parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+            for parts in (by_name[n] for n in names)
+        ]
+        return cls(columns, names, positions)
+
+    @classmethod
+    def from_names(cls, columns, names):
+        """Index of distinct ``names`` only, for stores that resolve rows themselves (no positions)."""
+        return cls(columns, sorted(names), None)
+
+    def match(self, query):
+        """Return the ids (a tuple) of names matching ``query`` (case-insensitive contains)."""
+        ids = self._matches.get(query)
+        if ids is None:
+            ids = tuple(self._match(query))
+            if len(self._matches) >= MATCH_CACHE_SIZE:
+                self._matches.clear()
+            self._matches[query] = ids
+        return ids
+
+    def _match(self, query):
+        if any(ch in _REGEX_CHARS for ch in query):
+            try:
+                pattern = re.compile(query, re.IGNORECASE)
+            except re.error:
+                return []
+            return [i for i, name in enumerate(self.names) if pattern.search(name)]
+
+        needle = query.lower()
+        if len(needle) < 3:
+            return [i for i, lname in enumerate(self._lower) if needle in lname]
+
+        postings = sorted((self._grams.get(g, ()) for g in _trigrams(needle)), key=len)
+        if not postings[0]:
+            return []
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return sorted(i for i in candidates if needle in self._lower[i])
+
+    def fuzzy(self, query, limit=5):
+        """
+        Up to ``limit`` ``(name id, score)`` pairs ranked by trigram similarity
+        to ``query`` (best first; score in 0..1).
+        """
+        grams = _padded_trigrams(query.lower())
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._fuzzy_grams.get(gram, ()))
+        scored = [(2 * n / (len(grams) + self._fuzzy_sizes[i]), i) for i, n in shared.items()]
+        scored.sort(key=lambda pair: (-pair[0], self.names[pair[1]]))
+        return [(i, round(score, 3)) for score, i in scored[:limit]]
+
+    def suggestions(self, query, limit=3):
+        """Names worth offering as "did you mean" for a query that matched nothing."""
+        if any(ch in _REGEX_CHARS for ch in query):
+            return []
+        return [self.names[i] for i, score in self.fuzzy(query, limit) if score >= FUZZY_SUGGEST]
+
+    @timed("lookup")
+    def resolve(self, query):
+        """
+        ``(ids, fuzzy)``: the :meth:`match` ids, or when there are none the
+        best fuzzy match scoring at least ``FUZZY_ACCEPT``, as ``fuzzy = (name id,
+        score)``; ``fuzzy`` is ``None`` for exact matches and misses.
+        """
+        result = self._resolved.get(query)
+        if result is None:
+            ids, fuzzy = self.match(query), None
+            if not ids and query.strip() and not any(ch in _REGEX_CHARS for ch in query):
+                best = self.fuzzy(query, 1)
+                if best and best[0][1] >= FUZZY_ACCEPT:
+                    fuzzy = best[0]
+                    ids = (fuzzy[0],)
+            result = ids, fuzzy
+            if len(self._resolved) >= MATCH_CACHE_SIZE:
+                self._resolved.clear()
+            self._resolved[query] = result
+        return result
+
+    def positions_for(self, name_ids):
+        """Sorted row positions covering the given names."""
+        if not name_ids:
+            return _EMPTY
+        if len(name_ids) == 1:
+            return self._positions[name_ids[0]]
+        return np.unique(np.concatenate([self._positions[i] for i in name_ids]))
+
+    def lookup(self, query):
+        """Sorted row positions whose location matches ``query``."""
+        return self.positions_for(self.match(query))
@@ -0,0 +1,28 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import intents
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark of intent parsing (per-query cost should not depend on the intent)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        queries = [q for q, _, _ in intents.EXAMPLES]
+        queries.append("show demand trend for " + " ".join(["a very long place name"] * 10))
+        parse = intents.parse
+        totals = []
+        for query in queries:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                parse(query)
+            per_call = (time.perf_counter() - start) / repeat * 1e6
+            totals.append(per_call)
+            self.stdout.write(f"{per_call:7.2f} us  {parse(query).name:<15} {query[:60]}")
+        self.stdout.write(f"median {statistics.median(totals):.2f} us, max {max(totals):.2f} us per query")
@@ -0,0 +1,57 @@
+import statistics
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api import views
+from api.encoding import Table
+from api.renderers import DatasetJSONRenderer
+
+
+def _legacy(rows):
+    # to_dict(records) + DRF's stock renderer; NaN is tolerated here only so the
+    # baseline can run at all (the strict stock renderer rejects it)
+    renderer = JSONRenderer()
+    renderer.strict = False
+    return renderer.render({"table": rows.to_dict(orient="records")})
+
+
+def _median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(out)
+
+
+class Command(BaseCommand):
+    help = "Payload size and render latency of analyze tables: to_dict(records) vs. the vectorized renderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--area", default="a", help="Area query whose matches form the table (default: broad 'a')")
+        parser.add_argument("--scale", type=int, default=500, help="Replicate the matched rows this many times")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if not views.manager.wait_ready():
+            raise CommandError(f"Dataset not available: {views.manager.load_error}")
+        rows = views.find_location_rows(options["area"])
+        if rows.empty:
+            raise CommandError(f"No rows match {options['area']!r}")
+        rows = pd.concat([rows] * options["scale"], ignore_index=True)
+        renderer = DatasetJSONRenderer()
+
+        def render(fmt):
+            return lambda: renderer.render({"table": Table(rows, fmt)})
+
+        self.stdout.write(f"{len(rows)} rows x {len(rows.columns)} columns")
+        cases = [("to_dict + JSONRenderer", lambda: _legacy(rows)), ("Table records", render("records")),
+                 ("Table columns", render("columns"))]
+        base = None
+        for name, fn in cases:
+            ms, size = _median_ms(fn, options["repeat"])
+            base = base or ms
+            self.stdout.write(f"{name:<24} {ms:9.2f} ms  {size / 1024:9.1f} KiB  x{base / ms:.1f}")
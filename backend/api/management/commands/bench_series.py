@@ -0,0 +1,56 @@
+import statistics
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from api import views
+
+
+def _legacy_points(area, col):
+    """The pre-store request path: scan, sort_values, iterrows."""
+    rows = views.find_location_rows(area)
+    ordered = rows.sort_values("year")
+    return [
+        {"year": int(r["year"]) if not pd.isna(r["year"]) else None,
+         "value": None if pd.isna(r[col]) else float(r[col])}
+        for _, r in ordered.iterrows()
+    ]
+
+
+def _store_points(area, metric):
+    ds = views.manager.current()
+    ids = ds.index.match(area)
+    return ds.series.points(ds.series.order(ids), metric)
+
+
+def _median_us(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+class Command(BaseCommand):
+    help = "Per-request series latency: legacy sort_values/iterrows path vs. the pre-aggregated series store."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        views.manager.wait_ready()
+        ds = views.manager.current()
+        if ds is None or ds.series is None:
+            raise CommandError(f"Dataset not available: {views.manager.load_error or 'no year column'}")
+        repeat = options["repeat"]
+
+        self.stdout.write(f"{'location':<20} {'metric':<8} {'legacy us':>10} {'store us':>10} {'speed-up':>9}")
+        for area in ds.index.names:
+            for metric, col in ds.schema.metrics.items():
+                if col is None:
+                    continue
+                legacy = _median_us(lambda: _legacy_points(area, col), repeat)
+                store = _median_us(lambda: _store_points(area, metric), repeat)
+                self.stdout.write(f"{area:<20} {metric:<8} {legacy:10.1f} {store:10.1f} {legacy / store:8.1f}x")
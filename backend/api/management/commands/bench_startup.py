@@ -0,0 +1,51 @@
+import statistics
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from api import snapshot
+from api.dataset import DATASET_PATH
+from api.sources import read_source
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+class Command(BaseCommand):
+    help = "Compare dataset load time: parsing the workbook vs. memory-mapping the snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=DATASET_PATH)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        source, repeat = options["source"], options["repeat"]
+
+        path, fingerprint = snapshot.find_snapshot(source)
+        if path is None:
+            snapshot.write_snapshot(read_source(source), source, fingerprint)
+            path, _ = snapshot.find_snapshot(source)
+
+        # sanity check: both paths must produce the same values (text columns come back categorical)
+        mapped = snapshot.read_snapshot(path)
+        text = mapped.select_dtypes("category").columns
+        pd.testing.assert_frame_equal(read_source(source), mapped.astype({c: object for c in text}))
+
+        results = {
+            "excel (openpyxl)": _timed(lambda: read_source(source), repeat),
+            "snapshot (validate + mmap)": _timed(lambda: snapshot.read_snapshot(snapshot.find_snapshot(source)[0]), repeat),
+        }
+        baseline = statistics.median(results["excel (openpyxl)"])
+        for name, samples in results.items():
+            median = statistics.median(samples)
+            self.stdout.write(
+                f"{name:<28} median {median:8.2f} ms  min {min(samples):8.2f} ms  "
+                f"speed-up x{baseline / median:.1f}"
+            )
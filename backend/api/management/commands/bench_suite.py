@@ -0,0 +1,219 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from api import intents, synthetic, views
+from api.dataset import BACKENDS, open_dataset
+from api.management.commands.loadtest import percentile, run_load
+
+
+def intent_queries(names):
+    """One query per intent branch (plus broad and misspelled variants) for a dataset with ``names``."""
+    a, b = names[0], names[min(1, len(names) - 1)]
+    return {
+        "list": ("list", "List places"),
+        "help": ("help", "help"),
+        "demand_compare": ("demand_compare", f"Compare {a} and {b} demand"),
+        "compare": ("compare", f"Compare {a} and {b}"),
+        "demand_trend": ("demand_trend", f"Show demand trend for {a}"),
+        "price_growth": ("price_growth", f"Show price growth for {a} over last 3 years"),
+        "analyze": ("analyze", f"Analyze {a}"),
+        "analyze_broad": ("analyze", "Analyze a"),
+        "analyze_fuzzy": ("analyze", f"Analyze {b[:2] + b[3:]}"),
+        "rank": ("rank", "Top 10 areas by price growth"),
+        "yoy": ("yoy", f"YoY change for {a}"),
+    }
+
+
+def _summary(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "median_ms": round(statistics.median(ordered), 4),
+        "p95_ms": round(percentile(ordered, 95), 4),
+        "min_ms": round(ordered[0], 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+    }
+
+
+def _time(fn, repeat, before=None):
+    samples = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return _summary(samples)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the analyze API on a synthetic dataset of the given size: dataset load (cold and warm), "
+        "find_location_rows and every intent through the Django test client (response cache cold and warm), "
+        "and response-cache hits against recomputing (a hit slower than computing fails the run). "
+        "Writes JSON with --output; --baseline compares against an earlier run. With --load-url it instead "
+        "drives concurrent requests against a running server (start it with DATASET_PATH set to a file from "
+        "generate_dataset with the same --locations/--years/--seed)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--locations", type=int, default=200)
+        parser.add_argument("--years", type=int, default=10)
+        parser.add_argument("--extra-columns", type=int, default=0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--format", choices=("csv", "xlsx", "parquet"), default="csv")
+        parser.add_argument("--backend", choices=tuple(BACKENDS), default="memory")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument("--baseline", help="Earlier --output file to compare medians against")
+        parser.add_argument("--tolerance", type=float, default=1.25,
+                            help="Median slow-down vs. the baseline that counts as a regression")
+        parser.add_argument("--load-url", help="Load mode: analyze URL of a running server")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if min(options["locations"], options["years"], options["repeat"]) < 1:
+            raise CommandError("--locations, --years and --repeat must be positive")
+        meta = {
+            "locations": options["locations"],
+            "years": options["years"],
+            "rows": options["locations"] * options["years"],
+            "extra_columns": options["extra_columns"],
+            "seed": options["seed"],
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        if options["load_url"]:
+            report = {"meta": meta, "load": self.load_mode(options)}
+        else:
+            meta.update(format=options["format"], backend=options["backend"], repeat=options["repeat"])
+            report = {"meta": meta, "results": self.in_process(options)}
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["baseline"] and "results" in report:
+            self.compare(report["results"], options["baseline"], options["tolerance"])
+
+    def load_mode(self, options):
+        names = synthetic.location_names(options["locations"], options["seed"])
+        queries = [query for _, query in intent_queries(names).values()]
+        summary = run_load(options["load_url"], queries, options["concurrency"], options["requests"])
+        self.stdout.write(
+            f"{summary['throughput_rps']} req/s  p50 {summary['p50_ms']:.1f} ms  p95 {summary['p95_ms']:.1f} ms  "
+            f"p99 {summary['p99_ms']:.1f} ms  statuses {summary['statuses']}"
+        )
+        return summary
+
+    def in_process(self, options):
+        repeat, backend = options["repeat"], options["backend"]
+        frame = synthetic.generate(options["locations"], options["years"], options["extra_columns"], seed=options["seed"])
+        names = synthetic.location_names(options["locations"], options["seed"])
+        queries = intent_queries(names)
+        for label, (name, query) in queries.items():
+            if intents.parse(query).name != name:
+                raise CommandError(f"Benchmark query {query!r} no longer parses as {name}")
+
+        tmp = tempfile.mkdtemp(prefix="bench-")
+        path = synthetic.write(frame, os.path.join(tmp, f"synthetic.{options['format']}"))
+        derived = [os.path.join(tmp, ".snapshot"), os.path.join(tmp, ".store")]
+        manager = views.manager
+        # the warmup must not race the reloads below
+        manager.wait_ready()
+        original = manager.path, manager.backend
+        results = {}
+        try:
+            def drop_derived():
+                for d in derived:
+                    shutil.rmtree(d, ignore_errors=True)
+
+            results["load_cold"] = _time(lambda: open_dataset(path, backend), min(repeat, 5), drop_derived)
+            results["load_warm"] = _time(lambda: open_dataset(path, backend), repeat)
+
+            manager.path, manager.backend = path, backend
+            manager.reload(force=True)
+            ds = manager.current()
+            if manager.load_error or ds.version != open_dataset(path, backend).version:
+                raise CommandError(f"Could not serve the synthetic dataset: {manager.load_error}")
+
+            misspelled = names[1][:2] + names[1][3:]
+            for label, area in (("exact", names[0]), ("broad", "a"), ("fuzzy", misspelled)):
+                results[f"find_location_rows_{label}"] = _time(lambda: ds.find_location_rows(area), repeat)
+
+            client = Client()
+            local = views.response_cache.local
+
+            def clear_cache():
+                if local is not None:
+                    local.clear()
+
+            for label, (_, query) in queries.items():
+                body = {"query": query, "table_format": "columns"}
+
+                def post():
+                    response = client.post("/api/analyze/", body, content_type="application/json")
+                    if response.status_code != 200:
+                        raise CommandError(f"{query!r} answered {response.status_code}: {response.content[:200]!r}")
+
+                results[f"intent_{label}_cold"] = _time(post, repeat, clear_cache)
+                results[f"intent_{label}_warm"] = _time(post, repeat)
+
+            # a cache hit must stay cheaper than recomputing, tables included
+            for label, (_, query) in queries.items() if local is not None else ():
+                intent = intents.parse(query)
+                if not intents.needs_data(intent.name):
+                    continue  # constant answers: as cheap as a lookup either way
+                key = views.intent_key(intent, ds.version)
+                views.response_cache.get_or_compute(key, lambda: intents.dispatch(intent, ds))
+                if local.get(key) is None:
+                    continue  # too many rows to cache
+                results[f"cache_hit_{label}"] = _time(lambda: views.response_cache.get(key), repeat)
+                results[f"compute_{label}"] = _time(lambda: intents.dispatch(intent, ds), repeat)
+        finally:
+            manager.path, manager.backend = original
+            manager.reload(force=True)
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.stdout.write(f"{'benchmark':<32} {'median ms':>10} {'p95 ms':>10} {'min ms':>10}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<32} {r['median_ms']:10.3f} {r['p95_ms']:10.3f} {r['min_ms']:10.3f}")
+        slower = [
+            name for name, r in results.items()
+            if name.startswith("cache_hit_") and r["median_ms"] > results[name.replace("cache_hit_", "compute_")]["median_ms"]
+        ]
+        if slower:
+            raise CommandError(f"Cache hits slower than recomputing: {', '.join(slower)}")
+        return results
+
+    def compare(self, results, baseline_path, tolerance):
+        try:
+            with open(baseline_path) as fh:
+                baseline = json.load(fh)["results"]
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Could not read baseline {baseline_path}: {exc}")
+        regressions = []
+        self.stdout.write(f"\n{'vs. baseline':<32} {'before':>10} {'after':>10} {'ratio':>7}")
+        for name, r in results.items():
+            if name not in baseline:
+                continue
+            before, after = baseline[name]["median_ms"], r["median_ms"]
+            ratio = after / before if before else float("inf")
+            flag = "  REGRESSION" if ratio > tolerance else ""
+            self.stdout.write(f"{name:<32} {before:10.3f} {after:10.3f} {ratio:6.2f}x{flag}")
+            if flag:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) slower than {tolerance}x baseline: {', '.join(regressions)}")
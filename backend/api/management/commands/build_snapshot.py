@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import snapshot
+from api.dataset import DATASET_PATH
+from api.sources import read_source
+
+
+class Command(BaseCommand):
+    help = "Rebuild the columnar snapshot of the dataset used for fast worker start-up."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=DATASET_PATH, help="Dataset file to snapshot (default: DATASET_PATH)")
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        try:
+            frame = read_source(source)
+            fingerprint = snapshot.source_fingerprint(source)
+            path = snapshot.write_snapshot(frame, source, fingerprint)
+        except (OSError, snapshot.SnapshotError) as exc:
+            raise CommandError(f"Could not build snapshot: {exc}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot written to {path} ({len(frame)} rows, {len(frame.columns)} columns, sha256 {fingerprint['sha256'][:12]})"
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a synthetic dataset in the realestate.xlsx schema (one row per location and year). "
+        "Serve it with DATASET_PATH=<file> to load-test a realistic size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Target file (.csv, .xlsx or .parquet)")
+        parser.add_argument("--locations", type=int, default=50)
+        parser.add_argument("--years", type=int, default=10)
+        parser.add_argument("--extra-columns", type=int, default=0, help="Additional numeric columns")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["locations"] < 1 or options["years"] < 1 or options["extra_columns"] < 0:
+            raise CommandError("--locations and --years must be positive, --extra-columns non-negative")
+        frame = synthetic.generate(options["locations"], options["years"], options["extra_columns"], seed=options["seed"])
+        try:
+            path = synthetic.write(frame, options["output"])
+        except (OSError, ValueError, ImportError) as exc:
+            raise CommandError(f"Could not write dataset: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(frame)} rows x {len(frame.columns)} columns to {path}"))
@@ -0,0 +1,120 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_QUERIES = [
+    "Analyze Wakad",
+    "List places",
+    "Compare Ambegaon Budruk and Aundh",
+    "Compare Wakad and Aundh demand",
+    "Show price growth for Akurdi over last 3 years",
+    "Show demand trend for Aundh",
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def run_load(url, queries, concurrency, total, timeout=30, body_extra=None):
+    """
+    Fire ``total`` POSTs at ``url`` from ``concurrency`` keep-alive connections.
+
+    Returns a summary dict (throughput, latency percentiles in ms, status counts).
+    """
+    parts = urlsplit(url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    bodies = [json.dumps(dict(body_extra or {}, query=q)).encode() for q in queries]
+    counter = iter(range(total))
+    lock = threading.Lock()
+    latencies, statuses, errors = [], {}, []
+
+    def worker():
+        conn = conn_cls(parts.netloc, timeout=timeout)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            try:
+                conn.request("POST", parts.path, body=bodies[i % len(bodies)],
+                             headers={"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                resp.read()
+                status = resp.status
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                conn = conn_cls(parts.netloc, timeout=timeout)
+                with lock:
+                    errors.append(str(exc))
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+        conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    wall = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall
+
+    latencies.sort()
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies) if latencies else None,
+        "statuses": statuses,
+        "errors": len(errors),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent analyze requests against a running server and report throughput and "
+        "latency percentiles. Run it once against the sync (gunicorn) and once against the ASGI "
+        "(uvicorn) deployment to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000/api/analyze/")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--query", action="append", dest="queries",
+                            help="Query to send (repeatable; default: the help examples)")
+        parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive")
+        summary = run_load(options["url"], options["queries"] or DEFAULT_QUERIES,
+                           options["concurrency"], options["requests"])
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+        fmt = lambda v: "-" if v is None else f"{v:.1f}"  # noqa: E731
+        self.stdout.write(
+            f"{summary['url']}  c={summary['concurrency']}  n={summary['requests']}\n"
+            f"  throughput {fmt(summary['throughput_rps'])} req/s in {summary['seconds']} s\n"
+            f"  latency ms p50 {fmt(summary['p50_ms'])}  p95 {fmt(summary['p95_ms'])}  "
+            f"p99 {fmt(summary['p99_ms'])}  mean {fmt(summary['mean_ms'])}\n"
+            f"  statuses {summary['statuses']}  transport errors {summary['errors']}"
+        )
@@ -0,0 +1,45 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.memory import child_pids, process_memory
+
+COLUMNS = ("rss_kb", "pss_kb", "shared_kb", "uss_kb")
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-worker memory (RSS, PSS, shared, private/USS) of a running gunicorn or uvicorn master and "
+        "its workers, from /proc. Compare runs with and without the preload config: the sum of PSS is the "
+        "real footprint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("pid", type=int, help="PID of the server master process")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        master = options["pid"]
+        if process_memory(master) is None:
+            raise CommandError(f"No readable /proc/{master}/smaps_rollup (is the PID right, and is this Linux?)")
+
+        rows = [{"pid": master, "role": "master", **process_memory(master)}]
+        for pid in child_pids(master):
+            memory = process_memory(pid)
+            if memory is not None:
+                rows.append({"pid": pid, "role": "worker", **memory})
+        workers = [r for r in rows if r["role"] == "worker"]
+        totals = {c: sum(r[c] for r in rows) for c in COLUMNS}
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"processes": rows, "totals": totals, "workers": len(workers)}, indent=2))
+            return
+        header = f"{'pid':>8} {'role':<7}" + "".join(f"{c[:-3].upper() + ' MiB':>12}" for c in COLUMNS)
+        self.stdout.write(header)
+        for r in rows + [dict(totals, pid="", role="total")]:
+            self.stdout.write(f"{r['pid']:>8} {r['role']:<7}" + "".join(f"{r[c] / 1024:12.1f}" for c in COLUMNS))
+        if workers:
+            mean_uss = sum(r["uss_kb"] for r in workers) / len(workers) / 1024
+            self.stdout.write(f"{len(workers)} workers, mean private (USS) {mean_uss:.1f} MiB per worker "
+                              f"(host has {os.cpu_count()} CPUs)")
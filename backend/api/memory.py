@@ -0,0 +1,53 @@
+# backend/api/memory.py
+"""
+Process memory figures from ``/proc/<pid>/smaps_rollup`` (Linux).
+
+RSS counts every resident page, including pages shared with other workers,
+so summing it over workers overstates the real footprint. PSS splits shared
+pages evenly between the processes mapping them, and USS (private pages) is
+what a worker would free on exit. ``sum(PSS)`` across workers is the true
+total. With the shared dataset layout, each worker's USS stays flat while
+its RSS includes the shared dataset pages.
+"""
+import os
+
+_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_kb",
+    "Shared_Dirty": "shared_kb",
+    "Private_Clean": "uss_kb",
+    "Private_Dirty": "uss_kb",
+}
+
+
+def process_memory(pid="self"):
+    """``{"rss_kb", "pss_kb", "shared_kb", "uss_kb"}`` for ``pid``, or ``None`` where unavailable."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as fh:
+            lines = fh.readlines()
+    except OSError:
+        return None
+    out = dict.fromkeys(("rss_kb", "pss_kb", "shared_kb", "uss_kb"), 0)
+    for line in lines:
+        name, _, rest = line.partition(":")
+        if name in _FIELDS:
+            out[_FIELDS[name]] += int(rest.split()[0])
+    return out
+
+
+def child_pids(pid):
+    """Direct children of ``pid`` (e.g. the gunicorn master's workers)."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as fh:
+                # the command name may contain spaces; fields after it are fixed
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
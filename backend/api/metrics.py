@@ -0,0 +1,211 @@
+# backend/api/metrics.py
+"""
+Per-stage latency metrics and on-demand profiling for analyze().
+
+Each analyze request carries a :class:`Trace`. Code on the hot path marks
+its stages with ``trace.stage(name)`` or, below the view, with the
+:func:`timed` decorator, which finds the request's trace through a context
+variable and costs one lookup when there is none. Stages:
+
+* ``parse`` -- query -> intent
+* ``handler`` -- the intent handler (cache misses only); it contains
+  ``lookup`` (area -> location ids), ``rows`` (row fetch) and ``series``
+  (year-ordered metrics)
+* ``paginate`` -- page cut / column projection
+* ``view`` -- the whole request before rendering
+* ``render`` -- JSON serialization of the payload
+
+When the request finishes, the durations go into per-``(stage, intent)``
+histograms and a per-``(intent, status)`` request counter. These are kept
+per process and exposed in Prometheus text format at ``GET /api/metrics/``.
+
+Only one request per process is profiled at a time: from Python 3.12 on,
+``cProfile`` refuses to start while another profiler is active.
+:func:`profiled` raises :class:`ProfilerBusy` instead of failing the request.
+"""
+import cProfile
+import functools
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# seconds; spans cached lookups (~100us) to slow uncached broad queries
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PROFILE_TOP = 30
+
+_current = ContextVar("analyze_trace", default=None)
+_profiling = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Another profiler is running in this process."""
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Stage histograms and request counters for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._requests = {}
+
+    def observe(self, stage, intent, seconds):
+        with self._lock:
+            hist = self._stages.get((stage, intent))
+            if hist is None:
+                hist = self._stages[(stage, intent)] = Histogram()
+            hist.observe(seconds)
+
+    def count_request(self, intent, status):
+        with self._lock:
+            key = (intent, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def render(self, extra_counters=None):
+        """Prometheus text exposition (format 0.0.4)."""
+        with self._lock:
+            stages = {k: (list(h.counts), h.sum, h.count) for k, h in self._stages.items()}
+            requests = dict(self._requests)
+        lines = [
+            "# HELP analyze_stage_seconds Time spent in each analyze stage, by intent.",
+            "# TYPE analyze_stage_seconds histogram",
+        ]
+        for (stage, intent), (counts, total, count) in sorted(stages.items()):
+            labels = f'stage="{stage}",intent="{intent}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'analyze_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'analyze_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"analyze_stage_seconds_sum{{{labels}}} {total:.9f}")
+            lines.append(f"analyze_stage_seconds_count{{{labels}}} {count}")
+        lines += [
+            "# HELP analyze_requests_total Analyze requests answered, by intent and status.",
+            "# TYPE analyze_requests_total counter",
+        ]
+        for (intent, status), n in sorted(requests.items()):
+            lines.append(f'analyze_requests_total{{intent="{intent}",status="{status}"}} {n}')
+        for name, (help_text, values) in (extra_counters or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for label, value in values.items():
+                lines.append(f'{name}{{event="{label}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class Trace:
+    """Stage timings of one request; flushed to the registry by :meth:`finish`."""
+
+    def __init__(self):
+        self.intent = "unknown"
+        self.timings = []
+        self.finished = False
+
+    def record(self, stage, seconds):
+        if self.finished:
+            # e.g. rendering, which runs after the view returned
+            registry.observe(stage, self.intent, seconds)
+        else:
+            self.timings.append((stage, seconds))
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @contextmanager
+    def active(self):
+        """Make this the trace :func:`timed` functions report to."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def finish(self, status):
+        for stage, seconds in self.timings:
+            registry.observe(stage, self.intent, seconds)
+        registry.count_request(self.intent, status)
+        self.finished = True
+
+    def stages_ms(self):
+        totals = {}
+        for stage, seconds in self.timings:
+            totals[stage] = totals.get(stage, 0.0) + seconds * 1000
+        return {stage: round(ms, 3) for stage, ms in totals.items()}
+
+
+def timed(stage):
+    """Decorator recording the call's duration as ``stage`` on the active trace, if any."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with trace.stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled():
+    """
+    cProfile the block; yields a dict that is filled with the top functions
+    by cumulative time. Raises :class:`ProfilerBusy` on entry if a profile
+    is already running.
+    """
+    if not _profiling.acquire(blocking=False):
+        raise ProfilerBusy()
+    report = {}
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # a profiler we don't own (debugger, coverage) holds the hook
+        _profiling.release()
+        raise ProfilerBusy()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        _profiling.release()
+        stats = pstats.Stats(profiler)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+        report["functions"] = [
+            {
+                "function": pstats.func_std_string(func),
+                "calls": nc,
+                "tottime_ms": round(tt * 1000, 3),
+                "cumtime_ms": round(ct * 1000, 3),
+            }
+            for func, (cc, nc, tt, ct, callers) in rows
+        ]
+        report["total_ms"] = round(stats.total_tt * 1000, 3)
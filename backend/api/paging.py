@@ -0,0 +1,166 @@
+# backend/api/paging.py
+"""
+Pagination and column projection for analyze table payloads.
+
+A request may add ``limit``/``offset`` and ``columns`` (a list or a
+comma-separated string). The response then carries only that page of
+``table``, restricted to those columns, plus
+``table_page = {total, offset, limit, columns, next_cursor}``.
+
+``next_cursor`` is an opaque token naming the dataset version, the parsed
+intent and the next offset, signed with an HMAC of ``SECRET_KEY`` so a
+client cannot make the server run intents or arguments the parser never
+produced. ``GET /api/analyze/page/?cursor=...`` serves it
+from :data:`result_sets`, the per-worker store of recent full results, so
+later pages do not re-run the query. A worker that does not hold the
+result set falls back to the response cache as long as the cursor's dataset
+version is still live.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .encoding import Table
+
+PAGED_FIELD = "table"
+MAX_PAGE_SIZE = int(os.environ.get("ANALYZE_MAX_PAGE_SIZE", "1000"))
+RESULT_SETS = int(os.environ.get("ANALYZE_RESULT_SETS", "256"))
+
+
+class PageError(ValueError):
+    """Invalid paging options or cursor; the message is safe to return to the client."""
+
+
+def _non_negative_int(value, name):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise PageError(f"'{name}' must be an integer")
+    if number < 0:
+        raise PageError(f"'{name}' cannot be negative")
+    return number
+
+
+def page_options(data):
+    """
+    ``(offset, limit, columns)`` from a request body or query dict, or ``None``
+    when the request asks for neither paging nor projection.
+    """
+    if not any(data.get(k) is not None for k in ("limit", "offset", "columns")):
+        return None
+    offset = _non_negative_int(data.get("offset", 0) or 0, "offset")
+    limit = data.get("limit")
+    if limit is not None:
+        limit = _non_negative_int(limit, "limit")
+        if limit < 1:
+            # a zero-row page would hand back a cursor to the same offset forever
+            raise PageError("'limit' must be at least 1")
+        if limit > MAX_PAGE_SIZE:
+            raise PageError(f"'limit' cannot exceed {MAX_PAGE_SIZE}")
+    columns = data.get("columns")
+    if isinstance(columns, str):
+        columns = [c.strip() for c in columns.split(",") if c.strip()]
+    elif columns is not None and not (isinstance(columns, list) and all(isinstance(c, str) for c in columns)):
+        raise PageError("'columns' must be a list of column names or a comma-separated string")
+    return offset, limit, columns or None
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _signature(body):
+    key = f"api.paging.cursor:{settings.SECRET_KEY}".encode("utf-8")
+    return hmac.new(key, body.encode("ascii"), hashlib.sha256).digest()[:16]
+
+
+def encode_cursor(version, intent, offset, limit, columns):
+    raw = json.dumps({"v": version, "i": intent.name, "a": list(intent.args),
+                      "o": offset, "n": limit, "c": columns}, separators=(",", ":"))
+    body = _b64(raw.encode("utf-8"))
+    return f"{body}.{_b64(_signature(body))}"
+
+
+def decode_cursor(cursor):
+    """``(version, intent name, args, offset, limit, columns)`` from a cursor token."""
+    try:
+        body, _, signature = cursor.partition(".")
+        if not hmac.compare_digest(_unb64(signature), _signature(body)):
+            raise PageError("Invalid cursor")
+        data = json.loads(_unb64(body))
+        _, limit, columns = page_options({"limit": data["n"], "columns": data["c"]}) or (0, None, None)
+        return (str(data["v"]), str(data["i"]), tuple(data["a"]),
+                _non_negative_int(data["o"], "offset"), limit, columns)
+    except PageError:
+        raise
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise PageError("Invalid cursor")
+
+
+def paginate(payload, intent, version, offset, limit, columns, table_format):
+    """
+    Copy of ``payload`` with ``table`` cut to one page and projected to
+    ``columns``, plus its ``table_page`` details. Payloads without a table are
+    returned unchanged.
+    """
+    table = payload.get(PAGED_FIELD)
+    if not isinstance(table, Table):
+        return payload
+    frame = table.frame
+    if columns:
+        unknown = [c for c in columns if c not in frame.columns]
+        if unknown:
+            raise PageError(f"Unknown column(s): {', '.join(unknown)}")
+        frame = frame[columns]
+
+    total = len(frame)
+    end = total if limit is None else min(total, offset + limit)
+    out = dict(payload)
+    out[PAGED_FIELD] = Table(frame.iloc[offset:end], table_format)
+    out["table_page"] = {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "columns": [str(c) for c in frame.columns],
+        "next_cursor": encode_cursor(version, intent, end, limit, columns) if end < total else None,
+    }
+    return out
+
+
+class ResultSets:
+    """Bounded LRU of full ``(payload, status)`` results by cache key, kept by reference."""
+
+    def __init__(self, max_entries=RESULT_SETS):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+result_sets = ResultSets()
@@ -0,0 +1,36 @@
+# backend/api/renderers.py
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .encoding import Table, json_values
+
+
+class DatasetJSONEncoder(JSONEncoder):
+    """DRF's encoder plus lazily encoded tables and stray numpy arrays / pandas objects."""
+
+    def default(self, obj):
+        if isinstance(obj, Table):
+            return obj.encode()
+        if hasattr(obj, "dtype") and getattr(obj, "ndim", 0) == 1:
+            return json_values(obj)
+        return super().default(obj)
+
+
+class DatasetJSONRenderer(JSONRenderer):
+    """
+    JSON renderer for analyze payloads.
+
+    Tables are converted column-by-column at render time, so the payload is
+    walked once by the (C) json encoder instead of being copied into row
+    dicts first and walked again by DRF.
+    """
+    encoder_class = DatasetJSONEncoder
+    compact = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # analyze views attach their metrics trace to the request
+        trace = getattr((renderer_context or {}).get("request"), "analyze_trace", None)
+        if trace is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        with trace.stage("render"):
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,129 @@
+# backend/api/rollups.py
+"""
+Per-location yearly rollups for the ranking and YoY intents.
+
+Built once per dataset load from one aggregation of the rows to one value
+per (location, year) -- ``demand`` summed, ``price`` averaged -- held as
+``locations x years`` arrays. From those, the load also derives:
+
+* ``yoy`` -- percent change against the previous year in the dataset
+* ``cagr`` -- percent compound annual growth from each location's first to
+  last year with a positive value
+* per-year ranks and the ranked orders behind them, for every metric and
+  measure
+
+so "top 10 areas by price growth" or "highest demand in 2023" slices a
+precomputed order (O(k)) instead of scanning rows per location.
+"""
+import numpy as np
+import pandas as pd
+
+from .encoding import json_values
+
+# how the rows of one location-year combine, per metric
+AGGREGATES = {"demand": "sum", "price": "mean"}
+
+
+def _yoy(values):
+    prev = values[:, :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(prev > 0, (values[:, 1:] / prev - 1) * 100, np.nan)
+    return np.hstack([np.full((len(values), 1), np.nan), change])
+
+
+def _cagr(values, years):
+    positive = values > 0
+    has = positive.any(axis=1)
+    first = np.argmax(positive, axis=1)
+    last = values.shape[1] - 1 - np.argmax(positive[:, ::-1], axis=1)
+    rows = np.arange(len(values))
+    span = (years[last] - years[first]).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = ((values[rows, last] / values[rows, first]) ** (1 / span) - 1) * 100
+    return np.where(has & (span > 0), growth, np.nan)
+
+
+def _ranked(values):
+    """Positions of the non-missing ``values``, highest first (ties keep location order)."""
+    present = np.flatnonzero(~np.isnan(values))
+    return present[np.argsort(-values[present], kind="stable")].astype(np.int32)
+
+
+class Rollups:
+    """Yearly per-location metrics plus their growth figures and rankings. Read-only."""
+
+    def __init__(self, locations, years, values):
+        self.locations = locations
+        self.years = years
+        self.values = values
+        self.yoy = {metric: _yoy(v) for metric, v in values.items()}
+        self.cagr = {metric: _cagr(v, years) for metric, v in values.items()}
+        self._position = {name: i for i, name in enumerate(locations)}
+        self._orders = {}
+        self.ranks = {}
+        for metric, v in values.items():
+            self._orders[(metric, "cagr", None)] = _ranked(self.cagr[metric])
+            ranks = np.zeros(v.shape, dtype=np.int32)
+            for j, year in enumerate(years.tolist()):
+                self._orders[(metric, "yoy", year)] = _ranked(self.yoy[metric][:, j])
+                order = self._orders[(metric, "value", year)] = _ranked(v[:, j])
+                ranks[order, j] = np.arange(1, len(order) + 1)
+            self.ranks[metric] = ranks
+
+    @classmethod
+    def from_aggregates(cls, frame):
+        """
+        ``frame`` has one row per (location, year) with ``location``, ``year``
+        and one column per metric, already aggregated per ``AGGREGATES``.
+        """
+        frame = frame.dropna(subset=["location", "year"])
+        frame = frame.assign(location=frame["location"].astype(str), year=frame["year"].astype(int))
+        metrics = [m for m in AGGREGATES if m in frame.columns]
+        wide = frame.pivot(index="location", columns="year", values=metrics)
+        years = np.sort(frame["year"].unique())
+        values = {m: wide[m].reindex(columns=years).to_numpy(dtype=float) for m in metrics}
+        return cls(wide.index.tolist(), years, values)
+
+    @classmethod
+    def from_frame(cls, frame, place, year, columns):
+        """Aggregate the rows of ``frame`` (``columns``: metric -> column) and build the rollups."""
+        columns = {m: c for m, c in columns.items() if m in AGGREGATES and c is not None}
+        grouped = frame.groupby([place, year], observed=True, sort=False)
+        parts = {
+            # sum(min_count=1): a location-year without any value stays missing, as in SQL
+            m: grouped[c].sum(min_count=1) if AGGREGATES[m] == "sum" else grouped[c].mean()
+            for m, c in columns.items()
+        }
+        aggregated = pd.DataFrame(parts).rename_axis(["location", "year"]).reset_index()
+        return cls.from_aggregates(aggregated)
+
+    def position(self, name):
+        return self._position.get(name)
+
+    def latest_year(self):
+        return int(self.years[-1]) if len(self.years) else None
+
+    def top(self, metric, measure, year=None, n=10, ascending=False):
+        """``[(rank, location, value)]`` of the ``n`` best (or worst) locations."""
+        order = self._orders[(metric, measure, None if measure == "cagr" else year)]
+        picked = order[::-1][:n] if ascending else order[:n]
+        if measure == "cagr":
+            values = self.cagr[metric][picked]
+        else:
+            column = int(np.searchsorted(self.years, year))
+            values = (self.yoy if measure == "yoy" else self.values)[metric][picked, column]
+        return list(zip(range(1, len(picked) + 1), [self.locations[i] for i in picked], json_values(values, float)))
+
+    def history(self, name):
+        """Frame of ``year`` plus value, YoY % and rank per metric for one location."""
+        i = self._position[name]
+        out = {"year": self.years}
+        for metric in self.values:
+            out[metric] = self.values[metric][i]
+            out[f"{metric} yoy %"] = np.round(self.yoy[metric][i], 2)
+            out[f"{metric} rank"] = self.ranks[metric][i]
+        frame = pd.DataFrame(out)
+        # rank 0 = no value that year
+        for metric in self.values:
+            frame[f"{metric} rank"] = frame[f"{metric} rank"].where(frame[f"{metric} rank"] > 0)
+        return frame[frame[list(self.values)].notna().any(axis=1)].reset_index(drop=True)
@@ -0,0 +1,113 @@
+# backend/api/schema.py
+"""
+Column roles resolved once per dataset load.
+
+The intents used to re-detect the place, demand and price columns on every
+request with per-column ``.lower()`` and dtype checks. ``DatasetSchema``
+runs that detection a single time on the loaded frame, with the same
+preference order as before, and is rebuilt only when the dataset is reloaded.
+"""
+import pandas as pd
+
+# Columns treated as the place name, in order of preference.
+PLACE_COLUMNS = ("final location", "final_location", "location", "area", "area name", "area_name")
+DEMAND_KEYWORDS = ["demand", "total units", "units", "supply", "launched"]
+PRICE_COLUMNS = ["flat - weighted average rate", "flat weighted average rate", "price", "avg_price"]
+
+
+def _numeric(frame, col):
+    return pd.api.types.is_numeric_dtype(frame[col])
+
+
+def _text(frame, col):
+    dtype = frame[col].dtype
+    return dtype == object or isinstance(dtype, pd.CategoricalDtype)
+
+
+def _find_place_col(frame):
+    for c in frame.columns:
+        if c.strip().lower() in PLACE_COLUMNS:
+            return c
+    return None
+
+
+def _find_demand_col(frame):
+    """Demand-like numeric column: keyword match, then any 'total' column, then the first numeric one."""
+    # try columns containing keywords and numeric
+    for col in frame.columns:
+        lname = col.lower()
+        if any(k in lname for k in DEMAND_KEYWORDS) and _numeric(frame, col):
+            return col
+    # fallback: any numeric column containing 'total'
+    for col in frame.columns:
+        if "total" in col.lower() and _numeric(frame, col):
+            return col
+    # last fallback: first numeric column
+    for col in frame.columns:
+        if _numeric(frame, col):
+            return col
+    return None
+
+
+def _find_compare_col(frame):
+    """Column used by the generic compare: prefer 'total'/'unit' columns, else the first numeric one."""
+    for col in frame.columns:
+        lc = col.lower()
+        if ("total" in lc or "unit" in lc) and _numeric(frame, col):
+            return col
+    # fallback first numeric column
+    for col in frame.columns:
+        if _numeric(frame, col):
+            return col
+    return None
+
+
+def _find_price_col(frame):
+    """Known price column names first, then any numeric column with 'price' or 'rate'."""
+    for candidate in PRICE_COLUMNS:
+        for c in frame.columns:
+            if c.lower().strip() == candidate:
+                return c
+    # fallback: any numeric column with 'price' or 'rate'
+    for c in frame.columns:
+        if ("price" in c.lower() or "rate" in c.lower()) and _numeric(frame, c):
+            return c
+    return None
+
+
+class DatasetSchema:
+    """Resolved column names for one loaded frame (``None`` when a role has no column)."""
+
+    def __init__(self, place, text_columns, year, demand, price, compare):
+        self.place = place
+        self.text_columns = text_columns
+        self.year = year
+        self.demand = demand
+        self.price = price
+        self.compare = compare
+
+    @classmethod
+    def resolve(cls, frame):
+        return cls(
+            place=_find_place_col(frame),
+            text_columns=[c for c in frame.columns if _text(frame, c)],
+            year="year" if "year" in frame.columns else None,
+            demand=_find_demand_col(frame),
+            price=_find_price_col(frame),
+            compare=_find_compare_col(frame),
+        )
+
+    @property
+    def search_columns(self):
+        """Columns location lookups match against: the place column, else every text column."""
+        return [self.place] if self.place else self.text_columns
+
+    @property
+    def listing_column(self):
+        """Column "list places" enumerates: the place column, else the first text column."""
+        return self.place or (self.text_columns[0] if self.text_columns else None)
+
+    @property
+    def metrics(self):
+        """Metric name -> column for the series store."""
+        return {"demand": self.demand, "price": self.price, "compare": self.compare}
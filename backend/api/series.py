@@ -0,0 +1,63 @@
+# backend/api/series.py
+"""
+Pre-aggregated per-location time series.
+
+The trend, compare, price-growth and analyze intents all used to sort the
+matching rows by year and walk them with ``iterrows()``. The store does that
+work once at load: it keeps the year column and the resolved metric columns as
+NumPy arrays and, for every name in the location index, the row positions in
+year order. A request then only gathers ``years[order]`` / ``values[order]``.
+"""
+import numpy as np
+
+from .encoding import json_values
+
+
+def _sort_by_year(years, positions):
+    """
+    ``positions`` (ascending) ordered by year, rows of the same year in source
+    order and missing years last: ``ORDER BY year IS NULL, year, rowid`` in
+    the SQLite store, so both backends list ties identically.
+    """
+    keys = years[positions]
+    if keys.dtype.kind == "f":
+        missing = np.isnan(keys)
+        present = np.flatnonzero(~missing)
+        order = np.concatenate([present[np.argsort(keys[present], kind="stable")], np.flatnonzero(missing)])
+    else:
+        order = np.argsort(keys, kind="stable")
+    return positions[order]
+
+
+class SeriesStore:
+    """Year-ordered row positions per location plus the metric arrays they index."""
+
+    def __init__(self, years, values, ordered):
+        self.years = years
+        self.values = values
+        self._ordered = ordered
+
+    @classmethod
+    def build(cls, frame, index, year_col, columns):
+        """
+        ``columns`` maps a metric name (e.g. "demand", "price") to the frame
+        column backing it; metrics without a column are skipped.
+        """
+        years = frame[year_col].to_numpy()
+        values = {metric: frame[col].to_numpy() for metric, col in columns.items() if col is not None}
+        ordered = [_sort_by_year(years, index.positions_for([i])) for i in range(len(index.names))]
+        return cls(years, values, ordered)
+
+    def order(self, name_ids):
+        """Row positions for the given location ids, sorted by year."""
+        if len(name_ids) == 1:
+            return self._ordered[name_ids[0]]
+        positions = np.unique(np.concatenate([self._ordered[i] for i in name_ids]))
+        return _sort_by_year(self.years, positions)
+
+    def points(self, order, metric):
+        """``[{"year": ..., "value": ...}]`` for the rows in ``order``."""
+        years = json_values(self.years[order], int)
+        values = json_values(self.values[metric][order], float)
+        return [{"year": y, "value": v} for y, v in zip(years, values)]
+
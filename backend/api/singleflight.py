@@ -0,0 +1,104 @@
+# backend/api/singleflight.py
+"""
+Request coalescing for analyze().
+
+When many clients ask the same question at once, every request used to miss
+the response cache and run the intent itself. :class:`SingleFlight` lets
+the first caller for a key (the *leader*) compute while concurrent callers
+for the same key wait for it and share its result (or its exception).
+
+Across gunicorn workers, the leader also takes an ``flock`` on a lock file
+before computing: a worker that had to wait for the lock re-checks the
+shared cache tier first and usually finds the answer there. Lock files are
+``LOCK_BUCKETS`` fixed files picked by key hash, so they never accumulate;
+two different keys that share a bucket only serialize, never mix results.
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: coalesce within the worker only
+    fcntl = None
+
+LOCK_BUCKETS = 256
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """At most one in-flight computation per key; concurrent callers share it."""
+
+    def __init__(self, lock_dir=None):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = dict.fromkeys(("leaders", "coalesced", "lock_waits", "worker_coalesced"), 0)
+
+    def count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def do(self, key, compute):
+        """``compute()``'s result, computed once for all concurrent callers with ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters["leaders"] += 1
+            else:
+                self._counters["coalesced"] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = compute()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @contextmanager
+    def worker_lock(self, key):
+        """
+        Hold the cross-worker lock for ``key``; yields whether another worker
+        held it first (so its result may already be in the shared cache).
+        """
+        if not self.lock_dir:
+            yield False
+            return
+        bucket = int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:8], 16) % LOCK_BUCKETS
+        fd = os.open(os.path.join(self.lock_dir, f"{bucket:03d}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            waited = False
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                waited = True
+                self.count("lock_waits")
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield waited
+        finally:
+            os.close(fd)  # releases the flock
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, in_flight=len(self._calls), cross_worker=bool(self.lock_dir))
@@ -0,0 +1,229 @@
+# backend/api/snapshot.py
+"""
+Columnar snapshot cache for the Excel dataset.
+
+Parsing the workbook with openpyxl dominates worker start-up, so the parsed
+frame is written once to a directory of NumPy ``.npy`` files (one per column)
+that later workers memory-map instead of re-parsing. Text columns are
+dictionary-encoded: a code array plus the list of distinct values, read back
+as ``pd.Categorical`` over the mapped codes.
+
+Every column is therefore a NumPy buffer backed by the page cache, not a
+block of Python objects: forked gunicorn workers (and separate processes
+mapping the same files) share one physical copy, and refcount traffic never
+touches the data pages.
+
+Layout::
+
+    dataset/.snapshot/
+        realestate.json              <- pointer: source mtime/size/sha256 + dir
+        realestate-<sha256[:16]>/
+            meta.json                <- column order and encodings
+            c000.npy, c001.npy ...   <- column data (codes for text columns)
+
+A snapshot is reused when the source mtime and size match the pointer; when
+they don't, the source is hashed and the snapshot is still reused if the
+content is unchanged (e.g. after a fresh checkout). Anything else rebuilds.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 2
+
+# Set REALESTATE_SNAPSHOT=0 to always parse the source directly.
+SNAPSHOT_ENABLED = os.environ.get("REALESTATE_SNAPSHOT", "1") != "0"
+
+
+class SnapshotError(Exception):
+    """Raised when a frame cannot be written to or read from a snapshot."""
+
+
+def snapshot_root(source_path):
+    override = os.environ.get("REALESTATE_SNAPSHOT_DIR")
+    if override:
+        return override
+    return os.path.join(os.path.dirname(source_path), ".snapshot")
+
+
+def _pointer_path(source_path):
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(snapshot_root(source_path), f"{stem}.json")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_fingerprint(path, sha256=None):
+    st = os.stat(path)
+    return {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": sha256 or file_sha256(path),
+    }
+
+
+def _read_json(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_atomic(path, payload):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            json.dump(payload, fh)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _code_dtype(n_categories):
+    """Smallest code dtype pandas itself uses for ``n_categories`` (so Categorical never copies the codes)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_column(series):
+    """Return (array, column meta) for one column."""
+    values = series.to_numpy()
+    if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        categories = uniques.tolist()
+        try:
+            json.dumps(categories, allow_nan=False)
+        except (TypeError, ValueError):
+            raise SnapshotError(f"Column {series.name!r} holds values that cannot be dictionary-encoded")
+        return codes.astype(_code_dtype(len(categories))), {"kind": "dict", "categories": categories}
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return values.view("i8"), {"kind": "datetime", "dtype": str(series.dtype)}
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+        return values, {"kind": "numeric", "dtype": series.dtype.str}
+    raise SnapshotError(f"Column {series.name!r} has unsupported dtype {series.dtype}")
+
+
+def _decode_column(arr, meta):
+    kind = meta["kind"]
+    if kind == "dict":
+        # code -1 is missing; the codes stay a view of the mapping
+        categories = pd.Index(meta["categories"], dtype=object)
+        return pd.Categorical.from_codes(np.asarray(arr), dtype=pd.CategoricalDtype(categories))
+    if kind == "datetime":
+        return np.asarray(arr).view(meta["dtype"])
+    # plain ndarray view over the mapping (pandas doesn't expect np.memmap)
+    return np.asarray(arr)
+
+
+def write_snapshot(frame, source_path, fingerprint):
+    """Write ``frame`` as the snapshot for ``source_path`` and update the pointer."""
+    root = snapshot_root(source_path)
+    os.makedirs(root, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    target = os.path.join(root, f"{stem}-{fingerprint['sha256'][:16]}")
+
+    columns = []
+    staging = tempfile.mkdtemp(dir=root, prefix=".build-")
+    try:
+        for i, name in enumerate(frame.columns):
+            arr, meta = _encode_column(frame[name])
+            meta["name"] = name
+            meta["file"] = f"c{i:03d}.npy"
+            np.save(os.path.join(staging, meta["file"]), np.ascontiguousarray(arr), allow_pickle=False)
+            columns.append(meta)
+        with open(os.path.join(staging, "meta.json"), "w") as fh:
+            json.dump({"format": FORMAT_VERSION, "rows": len(frame), "columns": columns}, fh)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Drop snapshots of older source versions once the pointer moves on.
+    previous = _read_json(_pointer_path(source_path))
+    _write_json_atomic(_pointer_path(source_path), dict(fingerprint, dir=os.path.basename(target), format=FORMAT_VERSION))
+    if previous and previous.get("dir") not in (None, os.path.basename(target)):
+        shutil.rmtree(os.path.join(root, previous["dir"]), ignore_errors=True)
+    return target
+
+
+def read_snapshot(path, mmap=True):
+    """Rebuild a DataFrame from a snapshot directory, memory-mapping numeric columns."""
+    meta = _read_json(os.path.join(path, "meta.json"))
+    if not meta or meta.get("format") != FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot at {path} is missing or has an old format")
+    data = {}
+    for col in meta["columns"]:
+        arr = np.load(os.path.join(path, col["file"]), mmap_mode="r" if mmap else None, allow_pickle=False)
+        data[col["name"]] = _decode_column(arr, col)
+    return pd.DataFrame(data, columns=[c["name"] for c in meta["columns"]], copy=False)
+
+
+def find_snapshot(source_path):
+    """Return (snapshot dir, fingerprint) if a valid snapshot exists for the source, else (None, fingerprint)."""
+    pointer = _read_json(_pointer_path(source_path))
+    st = os.stat(source_path)
+    valid = pointer and pointer.get("format") == FORMAT_VERSION and pointer.get("dir")
+    if valid and pointer.get("mtime_ns") == st.st_mtime_ns and pointer.get("size") == st.st_size:
+        fingerprint = {k: pointer[k] for k in ("mtime_ns", "size", "sha256")}
+    else:
+        fingerprint = source_fingerprint(source_path)
+        if not valid or pointer.get("sha256") != fingerprint["sha256"]:
+            return None, fingerprint
+        # content unchanged, only the mtime moved: refresh the pointer
+        try:
+            _write_json_atomic(_pointer_path(source_path), dict(pointer, **fingerprint))
+        except OSError:
+            pass
+    path = os.path.join(snapshot_root(source_path), pointer["dir"])
+    if not os.path.isfile(os.path.join(path, "meta.json")):
+        return None, fingerprint
+    return path, fingerprint
+
+
+def load_with_snapshot(source_path, reader, force_rebuild=False):
+    """
+    Return (frame, fingerprint) for ``source_path``.
+
+    ``reader(source_path)`` is only called when no valid snapshot exists; its
+    result is then written back as the new snapshot. Snapshot failures (e.g. a
+    read-only filesystem) never prevent the dataset from loading.
+    """
+    if not SNAPSHOT_ENABLED and not force_rebuild:
+        return reader(source_path), source_fingerprint(source_path)
+
+    path, fingerprint = (None, source_fingerprint(source_path)) if force_rebuild else find_snapshot(source_path)
+    if path:
+        try:
+            return read_snapshot(path), fingerprint
+        except (OSError, ValueError, SnapshotError):
+            pass
+
+    frame = reader(source_path)
+    try:
+        path = write_snapshot(frame, source_path, fingerprint)
+        # serve the mapped copy, so the first start has the same shared layout as later ones
+        return read_snapshot(path), fingerprint
+    except (OSError, ValueError, SnapshotError):
+        pass
+    return frame, fingerprint
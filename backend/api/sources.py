@@ -0,0 +1,71 @@
+# backend/api/sources.py
+"""
+Readers for the supported dataset file types.
+
+The source format is picked by extension: ``.xlsx``/``.xls`` workbooks,
+``.csv`` and ``.parquet``. ``read_source`` returns the whole file as one
+frame (the in-memory backend); ``iter_chunks`` streams it in bounded frames
+for ingestion into the on-disk store (:mod:`api.store`). Workbooks cannot be
+streamed and come back as a single chunk. Parquet needs the optional
+``pyarrow`` package.
+"""
+import os
+
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = int(os.environ.get("DATASET_CHUNK_ROWS", "100000"))
+
+
+class SourceError(Exception):
+    """Raised for unsupported or unreadable dataset sources."""
+
+
+def source_kind(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xls"):
+        return "excel"
+    if ext == ".csv":
+        return "csv"
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    raise SourceError(f"Unsupported dataset type '{ext}' ({path}); use .xlsx, .csv or .parquet")
+
+
+def _normalize_columns(frame):
+    # strip whitespace (but keep original case)
+    frame.columns = [c.strip() if isinstance(c, str) else c for c in frame.columns]
+    return frame
+
+
+def _parquet_file(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SourceError("Reading .parquet datasets requires the 'pyarrow' package")
+    return pq.ParquetFile(path)
+
+
+def read_source(path):
+    """Whole source file as one frame."""
+    kind = source_kind(path)
+    if kind == "excel":
+        frame = pd.read_excel(path, engine="openpyxl")
+    elif kind == "csv":
+        frame = pd.read_csv(path)
+    else:
+        frame = _parquet_file(path).read().to_pandas()
+    return _normalize_columns(frame)
+
+
+def iter_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield the source as frames of at most ``chunk_rows`` rows (workbooks: one frame)."""
+    kind = source_kind(path)
+    if kind == "excel":
+        yield read_source(path)
+    elif kind == "csv":
+        with pd.read_csv(path, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield _normalize_columns(chunk)
+    else:
+        for batch in _parquet_file(path).iter_batches(batch_size=chunk_rows):
+            yield _normalize_columns(batch.to_pandas())
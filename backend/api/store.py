@@ -0,0 +1,220 @@
+# backend/api/store.py
+"""
+On-disk SQLite store for datasets too large to hold in every worker.
+
+:func:`ingest` streams the source through :func:`api.sources.iter_chunks`
+into a ``rows`` table one chunk at a time, so ingestion memory is bounded by
+the chunk size rather than the file. It then indexes the location columns
+and ``year``, and records the source fingerprint in ``meta``. The database
+is built next to its final path and renamed into place, so readers never
+see a half-written store.
+
+Workers keep only the distinct location names in memory. Row lookups, year
+ordering and the "last N years" cut run as SQL against the store, and each
+request fetches only the rows it returns.
+
+Layout::
+
+    dataset/.store/<source stem>.sqlite3
+"""
+import json
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from .snapshot import source_fingerprint
+from .sources import DEFAULT_CHUNK_ROWS, iter_chunks
+
+SAMPLE_ROWS = 1000
+
+
+class StoreError(Exception):
+    """Raised when the store cannot be built or does not match its source."""
+
+
+def store_path(source_path):
+    root = os.environ.get("DATASET_STORE_DIR") or os.path.join(os.path.dirname(source_path), ".store")
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(root, f"{stem}.sqlite3")
+
+
+def quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def read_meta(db_path):
+    """Fingerprint and layout recorded at ingestion, or ``None`` if there is no readable store."""
+    if not os.path.isfile(db_path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+
+def ingest(source_path, db_path, fingerprint, index_columns, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Stream ``source_path`` into a fresh store at ``db_path``.
+
+    ``index_columns(sample_frame)`` names the columns to index, given the
+    first chunk (the caller resolves the schema from it).
+    """
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    staging = db_path + ".build"
+    if os.path.exists(staging):
+        os.unlink(staging)
+    conn = sqlite3.connect(staging)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        rows, columns, indexed = 0, None, []
+        for chunk in iter_chunks(source_path, chunk_rows):
+            if columns is None:
+                columns = [str(c) for c in chunk.columns]
+                indexed = [c for c in index_columns(chunk) if c in columns]
+            chunk.to_sql("rows", conn, if_exists="append", index=False)
+            rows += len(chunk)
+        if not rows:
+            raise StoreError(f"{source_path} has no rows")
+
+        for i, col in enumerate(dict.fromkeys(indexed)):
+            conn.execute(f"CREATE INDEX idx_{i} ON rows ({quote(col)})")
+        conn.execute("ANALYZE")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = dict(fingerprint, rows=rows, columns=columns)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, json.dumps(v)) for k, v in meta.items()])
+        conn.commit()
+    except BaseException:
+        conn.close()
+        if os.path.exists(staging):
+            os.unlink(staging)
+        raise
+    conn.close()
+    os.replace(staging, db_path)
+    return meta
+
+
+def open_store(source_path, index_columns, chunk_rows=DEFAULT_CHUNK_ROWS, force_rebuild=False):
+    """
+    ``(SQLiteStore, fingerprint)`` for ``source_path``, ingesting it first
+    when there is no store or the source content changed.
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Dataset not found at {source_path}. Put the data file there.")
+    db_path = store_path(source_path)
+    meta = None if force_rebuild else read_meta(db_path)
+    st = os.stat(source_path)
+    if meta and (meta.get("mtime_ns"), meta.get("size")) == (st.st_mtime_ns, st.st_size):
+        fingerprint = {k: meta[k] for k in ("mtime_ns", "size", "sha256")}
+    else:
+        fingerprint = source_fingerprint(source_path)
+        if not meta or meta.get("sha256") != fingerprint["sha256"]:
+            meta = ingest(source_path, db_path, fingerprint, index_columns, chunk_rows)
+    return SQLiteStore(db_path, meta), fingerprint
+
+
+class SQLiteStore:
+    """Read-only queries against one ingested store (one connection per thread)."""
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.rows = meta["rows"]
+        self.columns = meta["columns"]
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        # a connection inherited across fork() (gunicorn --preload) must not be reused
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.pid = os.getpid()
+        return conn
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self._conn(), params=params)
+
+    def declared_types(self):
+        """Column name -> declared SQLite type (``TEXT``, ``INTEGER``, ``REAL``, ``TIMESTAMP``)."""
+        return {name: (decl or "").upper() for _, name, decl, *_ in self._conn().execute("PRAGMA table_info(rows)")}
+
+    def sample(self, n=SAMPLE_ROWS):
+        """First ``n`` rows, for schema detection."""
+        return self.query("SELECT * FROM rows LIMIT ?", (n,))
+
+    def distinct(self, column):
+        cur = self._conn().execute(f"SELECT DISTINCT {quote(column)} FROM rows WHERE {quote(column)} IS NOT NULL")
+        return [str(v) for (v,) in cur]
+
+    @staticmethod
+    def _where(columns, names):
+        # one JSON parameter instead of one bound parameter per name (no variable limit)
+        clause = " OR ".join(f"{quote(c)} IN (SELECT value FROM json_each(?))" for c in columns)
+        return f"({clause})", [json.dumps(names)] * len(columns)
+
+    def matching(self, columns, names, select="*", year=None, min_year=None):
+        """
+        Rows whose ``columns`` hold any of ``names``: in source order, or by
+        ``year`` (missing years last) when given, optionally from ``min_year`` on.
+        """
+        where, params = self._where(columns, names)
+        if year is None:
+            return self.query(f"SELECT {select} FROM rows WHERE {where} ORDER BY rowid", params)
+        if min_year is not None:
+            where += f" AND {quote(year)} >= ?"
+            params.append(min_year)
+        return self.query(
+            f"SELECT {select} FROM rows WHERE {where} ORDER BY {quote(year)} IS NULL, {quote(year)}, rowid", params
+        )
+
+    def grouped_sums(self, columns, groups, year, value):
+        """
+        ``SUM(value)`` per (group, ``year``) in one query, ``groups`` being lists
+        of names; a row counts once per group however many of its columns match.
+        Returns a frame of ``group`` (position in ``groups``), ``year``, ``value``.
+        """
+        pairs = json.dumps([[g, name] for g, names in enumerate(groups) for name in names])
+        members = " UNION ".join(
+            f"SELECT m.g, r.rowid AS rid FROM m JOIN rows r ON r.{quote(c)} = m.name" for c in columns
+        )
+        return self.query(
+            "WITH m AS (SELECT json_extract(value, '$[0]') AS g, json_extract(value, '$[1]') AS name FROM json_each(?)) "
+            f"SELECT hit.g AS \"group\", rows.{quote(year)} AS year, SUM(rows.{quote(value)}) AS value "
+            f"FROM ({members}) AS hit JOIN rows ON rows.rowid = hit.rid GROUP BY hit.g, rows.{quote(year)}",
+            (pairs,),
+        )
+
+    def yearly(self, place, year, aggregates):
+        """
+        One row per (``place``, ``year``) as ``location``, ``year`` and one
+        column per ``aggregates`` entry (name -> ``(SQL function, column)``).
+        """
+        exprs = ", ".join(f"{fn}({quote(col)}) AS {quote(name)}" for name, (fn, col) in aggregates.items())
+        return self.query(
+            f"SELECT {quote(place)} AS location, {quote(year)} AS year, {exprs} FROM rows "
+            f"WHERE {quote(place)} IS NOT NULL AND {quote(year)} IS NOT NULL GROUP BY {quote(place)}, {quote(year)}"
+        )
+
+    def iter_matching(self, columns, names, select="*", year=None, min_year=None, max_year=None, chunk_rows=1000):
+        """
+        Like :meth:`matching` in source order, as frames of at most
+        ``chunk_rows`` rows, optionally limited to ``min_year..max_year``.
+        Always yields at least one (possibly empty) frame.
+        """
+        where, params = self._where(columns, names)
+        for bound, op in ((min_year, ">="), (max_year, "<=")):
+            if bound is not None:
+                where += f" AND {quote(year)} {op} ?"
+                params.append(bound)
+        sql = f"SELECT {select} FROM rows WHERE {where} ORDER BY rowid"
+        yield from pd.read_sql_query(sql, self._conn(), params=params, chunksize=chunk_rows)
+
+    def max_value(self, column, columns, names):
+        where, params = self._where(columns, names)
+        (value,) = self._conn().execute(f"SELECT MAX({quote(column)}) FROM rows WHERE {where}", params).fetchone()
+        return value
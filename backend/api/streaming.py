@@ -0,0 +1,46 @@
+# backend/api/streaming.py
+"""
+NDJSON streaming of analyze answers (``"stream": true`` in the request body).
+
+A buffered answer is one JSON document: every table row is encoded and the
+whole string rendered before the first byte goes out. A streamed answer is
+one JSON object per line instead:
+
+* ``{"event": "head", "status", "summary", "chart", ..., "tables": {name: {"rows", "columns"}}}``
+  -- everything except the tables, sent first so the client can show the answer
+* ``{"event": "rows", "table": name, "offset": i, "data": <slice>}`` -- the
+  table in slices of ``ANALYZE_STREAM_CHUNK_ROWS`` rows, each encoded in the
+  request's ``table_format`` only when it is sent
+* ``{"event": "end"}``
+
+so at most one slice of a table is held encoded at a time.
+"""
+import json
+import os
+from contextlib import nullcontext
+
+from .encoding import Table
+from .renderers import DatasetJSONEncoder
+
+CONTENT_TYPE = "application/x-ndjson"
+CHUNK_ROWS = int(os.environ.get("ANALYZE_STREAM_CHUNK_ROWS", "1000"))
+
+
+def _line(obj):
+    return json.dumps(obj, cls=DatasetJSONEncoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode() + b"\n"
+
+
+def ndjson_lines(payload, status, trace=None, chunk_rows=CHUNK_ROWS):
+    """Yield the NDJSON lines of ``payload``; encoding time goes to ``trace`` as the render stage."""
+    tables = {k: v for k, v in payload.items() if isinstance(v, Table)}
+    head = {k: v for k, v in payload.items() if k not in tables}
+    head["tables"] = {
+        name: {"rows": len(table), "columns": [str(c) for c in table.frame.columns]} for name, table in tables.items()
+    }
+    yield _line({"event": "head", "status": status, **head})
+    for name, table in tables.items():
+        for offset in range(0, len(table), chunk_rows):
+            with trace.stage("render") if trace is not None else nullcontext():
+                data = table.slice(offset, chunk_rows).encode()
+            yield _line({"event": "rows", "table": name, "offset": offset, "data": data})
+    yield _line({"event": "end"})
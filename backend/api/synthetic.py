@@ -0,0 +1,99 @@
+# backend/api/synthetic.py
+"""
+Synthetic datasets in the schema of ``dataset/realestate.xlsx``.
+
+One row per (location, year) with the same 28 columns and dtypes as the
+bundled workbook, plus optional extra numeric columns, so benchmarks can
+scale rows (``locations x years``) and width independently. Values are
+random but seeded, so a given size always produces the same file. The four
+real Pune locations come first, so the help examples keep working.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+REAL_LOCATIONS = ["Akurdi", "Ambegaon Budruk", "Aundh", "Wakad"]
+_SYLLABLES = ["ka", "ra", "di", "wa", "na", "ge", "ho", "pu", "ri", "la", "ba", "ne", "the", "shi", "va", "ma", "ko", "nd"]
+_SUFFIXES = ["", "", "", " Budruk", " Khurd", " Gaon", " Nagar", " Phase 2"]
+
+RATE_KINDS = ("flat", "office", "others", "shop")
+SOLD_KINDS = ("flat", "office", "others", "shop", "commercial", "other", "residential")
+
+
+def location_names(n, seed=0):
+    """``n`` distinct, pronounceable location names (the real ones first)."""
+    rng = np.random.default_rng(seed)
+    names = list(REAL_LOCATIONS[:n])
+    seen = set(names)
+    while len(names) < n:
+        stem = "".join(rng.choice(_SYLLABLES, size=rng.integers(2, 5))).capitalize()
+        name = stem + _SUFFIXES[rng.integers(len(_SUFFIXES))]
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def _rate_range(rng, rates):
+    low = np.round(rates * rng.uniform(1.1, 1.3, len(rates))).astype(int)
+    high = np.round(low * 1.105).astype(int)
+    return [f"{lo}-{hi}" for lo, hi in zip(low, high)]
+
+
+def generate(locations=50, years=10, extra_columns=0, start_year=2010, seed=0):
+    """Frame of ``locations * years`` rows in the realestate schema."""
+    rng = np.random.default_rng(seed)
+    names = location_names(locations, seed)
+    n = locations * years
+    loc = np.repeat(np.arange(locations), years)
+
+    # per-location level and trend, so series look like series rather than noise
+    base_rate = rng.uniform(5000, 12000, locations)[loc]
+    growth = rng.uniform(0.0, 0.08, locations)[loc]
+    year_idx = np.tile(np.arange(years), locations)
+    demand = rng.integers(50, 2000, locations)[loc]
+
+    frame = {
+        "final location": np.array(names, dtype=object)[loc],
+        "year": start_year + year_idx,
+        "city": np.full(n, "Pune", dtype=object),
+        "loc_lat": rng.uniform(18.4, 18.7, locations)[loc],
+        "loc_lng": rng.uniform(73.7, 74.0, locations)[loc],
+    }
+    sold = {kind: rng.integers(0, 500, n) for kind in SOLD_KINDS}
+    sold["other"] = sold["other"].astype(float)
+    frame["total_sales - igr"] = np.round(rng.uniform(1e8, 3e10, n), 2)
+    frame["total sold - igr"] = sold["flat"] + sold["office"] + sold["others"] + sold["shop"]
+    for kind in SOLD_KINDS:
+        frame[f"{kind}_sold - igr"] = sold[kind]
+    rates = {kind: base_rate * (1 + growth) ** year_idx * rng.uniform(0.9, 1.6, n) for kind in RATE_KINDS}
+    for kind in RATE_KINDS:
+        frame[f"{kind} - weighted average rate"] = rates[kind]
+    for kind in RATE_KINDS:
+        frame[f"{kind} - most prevailing rate - range"] = _rate_range(rng, rates[kind])
+    units = np.maximum(0, demand + rng.integers(-40, 40, n))
+    frame["total units"] = units
+    frame["total carpet area supplied (sqft)"] = units * rng.uniform(300, 700, n)
+    frame["flat total"] = np.round(units * 0.95).astype(int)
+    frame["shop total"] = rng.integers(0, 10, n)
+    frame["office total"] = rng.integers(0, 10, n)
+    frame["others total"] = rng.integers(0, 5, n)
+    for i in range(extra_columns):
+        frame[f"extra metric {i:02d}"] = rng.normal(size=n)
+    return pd.DataFrame(frame)
+
+
+def write(frame, path):
+    """Write ``frame`` in the format implied by ``path`` (.xlsx, .csv or .parquet)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xlsx":
+        frame.to_excel(path, index=False, engine="openpyxl")
+    elif ext == ".csv":
+        frame.to_csv(path, index=False)
+    elif ext in (".parquet", ".pq"):
+        frame.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported dataset type '{ext}'; use .xlsx, .csv or .parquet")
+    return path
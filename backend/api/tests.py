@@ -1,3 +1,798 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from importlib.util import find_spec
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import AsyncClient, SimpleTestCase, override_settings
+
+from . import export, intents, metrics, streaming, synthetic, views
+from .cache import MAX_CACHED_ROWS, ResponseCache
+from .dataset import EXCEL_PATH, Dataset, DatasetManager, StoreDataset, manager
+from .encoding import Table, json_values
+from .location_index import LocationIndex
+from .paging import PageError, decode_cursor, page_options, paginate
+from .renderers import DatasetJSONRenderer
+from .rollups import Rollups
+from .schema import DatasetSchema
+from .singleflight import SingleFlight
+from .snapshot import load_with_snapshot, read_snapshot, source_fingerprint, write_snapshot
+from .sources import read_source
+
+
+def _scan(frame, column, query):
+    """The per-request scan the location index replaces."""
+    return frame[frame[column].astype(str).str.contains(query, case=False, na=False)]
+
+
+class LocationIndexTests(SimpleTestCase):
+    frame = pd.DataFrame({
+        "final location": ["Wakad", "Aundh", "Wakad", None, "Ambegaon Budruk", "Baner", "aundh"],
+        "year": [2020, 2020, 2021, 2021, 2020, 2022, 2023],
+    })
+
+    def test_matches_str_contains(self):
+        index = LocationIndex.build(self.frame, ["final location"])
+        for query in ["wakad", "WAK", "a", "", "aund", "budruk", "nan", "xyz", "wak.d", "a|b", "wak[", "on bu"]:
+            with self.subTest(query=query):
+                expected = _scan(self.frame, "final location", query) if query != "wak[" else self.frame.iloc[0:0]
+                pd.testing.assert_frame_equal(self.frame.take(index.lookup(query)), expected)
+
+    def test_falls_back_to_all_text_columns(self):
+        frame = self.frame.rename(columns={"final location": "locality"}).assign(city=["Pune"] * 6 + ["Wakad"])
+        index = LocationIndex.build(frame, DatasetSchema.resolve(frame).search_columns)
+        self.assertEqual(index.columns, ["locality", "city"])
+        self.assertEqual(index.lookup("wakad").tolist(), [0, 2, 6])
+
+    def test_fuzzy_fallback_for_misspellings(self):
+        index = LocationIndex.build(self.frame, ["final location"])
+        wakad = index.names.index("Wakad")
+        self.assertEqual(index.resolve("wakad"), (index.match("wakad"), None))
+        ids, fuzzy = index.resolve("wakkad")
+        self.assertEqual((ids, fuzzy[0]), ((wakad,), wakad))
+        self.assertEqual(index.resolve("ambegon budruk")[0], (index.names.index("Ambegaon Budruk"),))
+        # too far off to substitute, close enough to suggest
+        self.assertEqual(index.resolve("bnaer"), ((), None))
+        self.assertIn("Baner", index.suggestions("bnaer"))
+        self.assertEqual(index.suggestions("zzzz"), [])
+
+    def test_suggestions_skip_regex_queries(self):
+        index = LocationIndex.build(self.frame, ["final location"])
+        self.assertEqual(index.resolve("wak["), ((), None))
+        self.assertEqual(index.suggestions("wak["), [])
+
+
+class IntentParserTests(SimpleTestCase):
+    # README / help / quick-action examples, plus place names the old
+    # str.replace extraction used to mangle
+    CASES = intents.EXAMPLES
+
+    def test_example_queries(self):
+        for query, name, args in self.CASES:
+            with self.subTest(query=query):
+                self.assertEqual(intents.parse(query), intents.Intent(name, args))
+
+    def test_every_intent_has_a_handler(self):
+        from . import handlers  # noqa: F401 -- registers the handlers
+        for _, name, _ in self.CASES:
+            self.assertTrue(callable(intents.handler_for(name)))
+
+
+class PagingTests(SimpleTestCase):
+    intent = intents.Intent("analyze", ("a",))
+    payload = {"summary": "...", "table": Table(LocationIndexTests.frame)}
+
+    def test_cursor_walks_every_row_once(self):
+        page = paginate(self.payload, self.intent, "v1", 0, 3, ["year"], "records")
+        rows = []
+        while True:
+            rows += [r["year"] for r in page["table"].encode()]
+            cursor = page["table_page"]["next_cursor"]
+            if cursor is None:
+                break
+            version, name, args, offset, limit, columns = decode_cursor(cursor)
+            self.assertEqual((version, intents.Intent(name, args), limit, columns), ("v1", self.intent, 3, ["year"]))
+            page = paginate(self.payload, self.intent, version, offset, limit, columns, "records")
+        self.assertEqual(rows, LocationIndexTests.frame["year"].tolist())
+        self.assertEqual(page["table_page"]["total"], 7)
+
+    def test_rejects_unknown_columns_and_bad_cursors(self):
+        with self.assertRaises(PageError):
+            paginate(self.payload, self.intent, "v1", 0, 3, ["nope"], "records")
+        with self.assertRaises(PageError):
+            decode_cursor("not a cursor")
+
+    def test_page_endpoint_only_accepts_signed_cursors(self):
+        manager.wait_ready()
+        response = self.client.post("/api/analyze/", {"query": "Analyze a", "limit": 2}, content_type="application/json")
+        cursor = response.json()["table_page"]["next_cursor"]
+        self.assertEqual(self.client.get("/api/analyze/page/", {"cursor": cursor}).status_code, 200)
+
+        body, _, signature = cursor.partition(".")
+        forged = json.dumps({"v": manager.current().version, "i": "price_growth", "a": ["wakad", 10**30],
+                             "o": 0, "n": 2, "c": None})
+        forged = base64.urlsafe_b64encode(forged.encode()).decode().rstrip("=")
+        for bad in (forged, f"{forged}.{signature}", f"{body}x.{signature}"):
+            self.assertEqual(self.client.get("/api/analyze/page/", {"cursor": bad}).status_code, 400)
+
+    def test_rejects_empty_pages(self):
+        with self.assertRaises(PageError):
+            page_options({"limit": 0})
+        self.assertEqual(page_options({"limit": "1", "offset": 4}), (4, 1, None))
+
+
+class StreamingTests(SimpleTestCase):
+    def test_head_first_then_table_slices(self):
+        frame = LocationIndexTests.frame
+        payload = {"summary": "...", "chart": {"years": [2020.0]}, "table": Table(frame, "columns")}
+        lines = [json.loads(line) for line in streaming.ndjson_lines(payload, 200, chunk_rows=3)]
+
+        self.assertEqual([line["event"] for line in lines], ["head", "rows", "rows", "rows", "end"])
+        self.assertEqual(lines[0]["summary"], "...")
+        self.assertEqual(lines[0]["tables"], {"table": {"rows": 7, "columns": list(frame.columns)}})
+        self.assertEqual([line["offset"] for line in lines[1:-1]], [0, 3, 6])
+        years = [y for line in lines[1:-1] for y in line["data"]["data"][list(frame.columns).index("year")]]
+        self.assertEqual(years, frame["year"].tolist())
+
+
+class HttpCacheTests(SimpleTestCase):
+    def setUp(self):
+        manager.wait_ready()
+
+    def test_get_redirects_to_canonical_url_and_revalidates(self):
+        response = self.client.get("/api/analyze/?table_format=columns&q=Analyze++Wakad%3F&limit=020")
+        self.assertEqual(response.status_code, 301)
+        url = response["Location"]
+        self.assertEqual(url, "/api/analyze/?limit=20&q=analyze%20wakad&table_format=columns")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age", response["Cache-Control"])
+        self.assertEqual(response.json()["table_page"]["limit"], 20)
+
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b"")
+        self.assertNotEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 304)
+
+
+class CompareTests(SimpleTestCase):
+    def setUp(self):
+        manager.wait_ready()
+
+    def ask(self, query):
+        response = self.client.post("/api/analyze/", {"query": query}, content_type="application/json")
+        return response.status_code, response.json()
+
+    def test_many_areas_share_one_year_axis(self):
+        for query, key in (("Compare Wakad, Aundh and Akurdi", "compare"), ("compare wakad, aundh and akurdi demand", "demand_compare")):
+            with self.subTest(query=query):
+                status, payload = self.ask(query)
+                self.assertEqual(status, 200)
+                aligned = payload["aligned"]
+                self.assertEqual(list(aligned["series"]), ["wakad", "aundh", "akurdi"])
+                self.assertEqual(list(payload[key]), ["wakad", "aundh", "akurdi"])
+                self.assertEqual(aligned["years"], sorted(aligned["years"]))
+                for values in aligned["series"].values():
+                    self.assertEqual(len(values), len(aligned["years"]))
+
+    def test_repeated_areas_are_listed_once(self):
+        status, payload = self.ask("compare wakad, aundh and wakd")
+        self.assertEqual(status, 200)
+        self.assertEqual(list(payload["aligned"]["series"]), ["wakad", "aundh"])
+        self.assertEqual(payload["summary"].count("wakad"), 1)
+        self.assertEqual(self.ask("compare wakad and wakad")[0], 400)
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = ResponseCache()
+        self.version = f"test-{time.time_ns()}"
+        self.calls = []
+
+    def key(self, query, version=None):
+        return views.intent_key(intents.parse(query), version or self.version)
+
+    def compute(self, payload):
+        def run():
+            self.calls.append(1)
+            return payload, 200
+        return run
+
+    def test_spellings_share_a_key_and_versions_do_not(self):
+        self.assertEqual(self.key("Analyze Wakad"), self.key("  ANALYZE   wakad?"))
+        self.assertNotEqual(self.key("Analyze Wakad"), self.key("Analyze Wakad", self.version + "-next"))
+
+        answer = self.compute({"summary": "wakad"})
+        for key in (self.key("Analyze Wakad"), self.key("analyze  WAKAD"), self.key("Analyze Wakad", self.version + "-next")):
+            self.assertEqual(self.cache.get_or_compute(key, answer), ({"summary": "wakad"}, 200))
+
+        self.assertEqual(len(self.calls), 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats["local_hits"], stats["misses"], stats["stores"]), (1, 2, 2))
+        self.assertEqual(stats["hit_ratio"], round(1 / 3, 4))
+
+    def test_hits_are_served_without_copying(self):
+        # LocMemCache unpickled every hit, rebuilding table frames on each read
+        table = Table(pd.DataFrame({"x": range(1000)}))
+        key = self.key("Analyze a")
+        stored = self.cache.get_or_compute(key, self.compute({"table": table}))
+        self.assertIs(self.cache.get(key), stored)
+        self.assertIs(stored[0]["table"], table)
+
+    def test_local_tier_is_bounded(self):
+        cache = ResponseCache(local_size=2)
+        for area in ("aundh", "baner", "wakad"):
+            cache.set(area, ({"summary": area}, 200))
+        cache.get("baner")
+        cache.set("akurdi", ({"summary": "akurdi"}, 200))
+        self.assertEqual([cache.get(area) is not None for area in ("aundh", "baner", "wakad", "akurdi")],
+                         [False, True, False, True])
+
+    def test_large_tables_are_not_cached(self):
+        big = self.compute({"table": Table(pd.DataFrame({"x": range(MAX_CACHED_ROWS + 1)}))})
+        for _ in range(2):
+            self.cache.get_or_compute(self.key("Analyze a"), big)
+        stats = self.cache.stats()
+        self.assertEqual((len(self.calls), stats["skipped"], stats["stores"]), (2, 2, 0))
+
+
+class AsyncAnalyzeTests(SimpleTestCase):
+    url = "/api/analyze/async/"
+
+    def setUp(self):
+        manager.wait_ready()
+        self.client = AsyncClient()
+
+    async def test_post_matches_the_sync_view(self):
+        response = await self.client.post(self.url, {"query": "Analyze Wakad"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content)
+        self.assertIn("wakad", payload["summary"])
+        self.assertEqual(payload["dataset_version"], manager.current().version)
+
+        response = await self.client.post(self.url, b"[1]", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    async def test_stream(self):
+        response = await self.client.post(self.url, {"query": "Analyze Wakad", "stream": True}, content_type="application/json")
+        self.assertEqual(response["Content-Type"], streaming.CONTENT_TYPE)
+        lines = [json.loads(line) for line in b"".join([c async for c in response.streaming_content]).splitlines()]
+        self.assertEqual(lines[0]["event"], "head")
+        self.assertEqual(lines[-1]["event"], "end")
+
+    async def test_stream_holds_its_permit_until_encoded(self):
+        body = {"query": "Analyze Wakad", "stream": True}
+        with mock.patch.object(views, "_pending", threading.BoundedSemaphore(1)):
+            response = await self.client.post(self.url, body, content_type="application/json")
+            busy = await self.client.post(self.url, {"query": "Analyze Wakad"}, content_type="application/json")
+            self.assertEqual((busy.status_code, busy["Retry-After"]), (503, "1"))
+            [c async for c in response.streaming_content]
+            again = await self.client.post(self.url, {"query": "Analyze Wakad"}, content_type="application/json")
+            self.assertEqual(again.status_code, 200)
+
+    async def test_get_revalidates(self):
+        url = f"{self.url}?q=analyze%20wakad"
+        response = await self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        revalidated = await self.client.get(url, headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(revalidated.status_code, 304)
+
+
+class BatchTests(SimpleTestCase):
+    def setUp(self):
+        manager.wait_ready()
+
+    def post(self, queries):
+        return self.client.post("/api/analyze/batch/", {"queries": queries}, content_type="application/json")
+
+    def test_results_keep_request_order_and_isolate_failures(self):
+        queries = ["Analyze Aundh", "", 42, "Analyze Nowhere Xyz", "Analyze Wakad"]
+        response = self.post(queries)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["query"] for r in results], queries)
+        self.assertEqual([r["status"] for r in results], [200, 400, 400, 404, 200])
+        self.assertIn("aundh", results[0]["summary"])
+        self.assertIn("wakad", results[4]["summary"])
+
+    def test_identical_intents_run_once(self):
+        with mock.patch.object(views, "run_intent", wraps=views.run_intent) as run:
+            results = self.post(["Analyze Wakad", "analyze  wakad?", "Analyze Aundh", "Analyze Wakad"]).json()["results"]
+        self.assertEqual(run.call_count, 2)
+        self.assertEqual(results[0]["summary"], results[3]["summary"])
+
+    @override_settings(ANALYZE_BATCH_LIMIT=2)
+    def test_batch_limit(self):
+        self.assertEqual(self.post(["help", "help", "help"]).status_code, 400)
+        self.assertEqual(self.post(["help", "help"]).status_code, 200)
+        self.assertEqual(self.post([]).status_code, 400)
+
+
+class DatasetReloadTests(SimpleTestCase):
+    def test_swap_skip_and_failure(self):
+        frame = StoreDatasetTests.frame
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sample.csv")
+            frame.to_csv(path, index=False)
+            reloads = DatasetManager(path=path)
+            self.assertTrue(reloads.reload())
+            first = reloads.current()
+
+            # rewritten with the same content: new mtime, same hash, nothing swapped
+            time.sleep(0.01)
+            frame.to_csv(path, index=False)
+            self.assertFalse(reloads.reload())
+            self.assertIs(reloads.current(), first)
+
+            # new content: a fully built dataset replaces the old one, which requests
+            # already holding it keep answering from
+            frame.assign(**{"total units": frame["total units"] * 10}).to_csv(path, index=False)
+            self.assertTrue(reloads.reload())
+            second = reloads.current()
+            self.assertNotEqual(second.version, first.version)
+            self.assertEqual(second.points(second.index.match("baner"), "demand"), [{"year": 2021, "value": 70.0}])
+            self.assertEqual(first.points(first.index.match("baner"), "demand"), [{"year": 2021, "value": 7.0}])
+
+            # a broken file keeps the last good version live
+            with open(path, "w") as f:
+                f.write("")
+            self.assertFalse(reloads.reload())
+            self.assertIs(reloads.current(), second)
+            self.assertIsNotNone(reloads.load_error)
+
+    def test_watcher_retries_a_change_another_reload_may_have_missed(self):
+        frame = StoreDatasetTests.frame
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sample.csv")
+            frame.to_csv(path, index=False)
+            watched = DatasetManager(path=path)
+            self.assertTrue(watched.reload())
+            first = watched.current()
+            # another reload holds the lock while the file changes: the watcher's own
+            # reload is skipped and must be retried once the lock is free
+            with watched._reload_lock:
+                watched.start_watching(interval=0.01)
+                time.sleep(0.05)
+                frame.assign(**{"total units": frame["total units"] * 10}).to_csv(path, index=False)
+                time.sleep(0.05)
+            deadline = time.time() + 10
+            while watched.current() is first and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertIsNot(watched.current(), first)
+
+
+class WarmupTests(SimpleTestCase):
+    def test_warmup_retries_until_the_dataset_loads(self):
+        warming = DatasetManager(path=os.path.join(tempfile.gettempdir(), "missing.xlsx"))
+        warming.start_warmup(initial_delay=0.01, max_delay=0.02)
+        self.assertFalse(warming.wait_ready(5))
+        self.assertEqual(warming.readiness()["state"], "retrying")
+
+        warming.path = EXCEL_PATH
+        deadline = time.time() + 30
+        while warming.state != "ready" and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(warming.state, "ready")
+        self.assertGreater(warming.attempts, 1)
+        self.assertIn("warmup_seconds", warming.readiness())
+
+    def test_a_running_reload_is_not_a_failed_attempt(self):
+        warming = DatasetManager(path=EXCEL_PATH)
+        with warming._reload_lock:
+            self.assertIsNone(warming.reload())
+            warming.start_warmup(initial_delay=0.01, max_delay=0.02)
+            time.sleep(0.05)
+            self.assertEqual((warming.state, warming.attempts, warming.load_error), ("warming", 0, None))
+        self.assertTrue(warming.wait_ready(30))
+        self.assertEqual(warming.attempts, 1)
+
+    def test_cold_worker_answers_help_and_defers_the_rest(self):
+        manager.wait_ready()
+        self.assertEqual(self.client.get("/api/health/").status_code, 200)
+        self.assertTrue(self.client.get("/api/ready/").json()["ready"])
+
+        live, manager._current = manager._current, None
+        try:
+            self.assertEqual(self.client.post("/api/analyze/", {"query": "help"}, content_type="application/json").status_code, 200)
+            response = self.client.post("/api/analyze/", {"query": "Analyze Wakad"}, content_type="application/json")
+            self.assertEqual((response.status_code, response["Retry-After"]), (503, "2"))
+            self.assertEqual(self.client.get("/api/ready/").status_code, 503)
+        finally:
+            manager._current = live
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_computation(self):
+        flights = SingleFlight()
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "answer"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flights.do("k", compute))) for _ in range(8)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        while flights.stats()["coalesced"] < 7:
+            time.sleep(0.001)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual((len(calls), results), (1, ["answer"] * 8))
+        self.assertEqual(flights.stats()["leaders"], 1)
+        self.assertEqual(flights.do("k", lambda: "again"), "again")
+
+    def test_worker_lock_reports_waiting(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first, second = SingleFlight(tmp), SingleFlight(tmp)
+            waited = []
+            with first.worker_lock("k") as first_waited:
+                def take():
+                    with second.worker_lock("k") as w:
+                        waited.append(w)
+
+                t = threading.Thread(target=take)
+                t.start()
+                time.sleep(0.05)
+                self.assertEqual(waited, [])
+            t.join(5)
+            self.assertEqual((first_waited, waited), (False, [True]))
+
+
+class EncodingTests(SimpleTestCase):
+    frame = pd.DataFrame({
+        "place": pd.Categorical(["Wakad", None, "Aundh"]),
+        "note": ["x", np.nan, None],
+        "year": [2020, 2021, 2022],
+        "rate": [1.5, np.nan, 3.0],
+        "recorded": pd.to_datetime(["2020-01-01 00:00", None, "2022-06-30 12:30"]),
+    })
+
+    def test_json_values(self):
+        self.assertEqual(json_values(self.frame["rate"]), [1.5, None, 3.0])
+        self.assertEqual(json_values(self.frame["rate"], int), [1, None, 3])
+        self.assertEqual(json_values(self.frame["year"], float), [2020.0, 2021.0, 2022.0])
+        self.assertEqual(json_values(self.frame["note"]), ["x", None, None])
+        self.assertEqual(json_values(self.frame["place"]), ["Wakad", None, "Aundh"])
+        self.assertEqual(json_values(self.frame["recorded"]), ["2020-01-01T00:00:00", None, "2022-06-30T12:30:00"])
+        self.assertIs(type(json_values(self.frame["year"])[0]), int)
+
+    def test_table_encoding(self):
+        records = Table(self.frame).encode()
+        self.assertEqual(records, [
+            {"place": "Wakad", "note": "x", "year": 2020, "rate": 1.5, "recorded": "2020-01-01T00:00:00"},
+            {"place": None, "note": None, "year": 2021, "rate": None, "recorded": None},
+            {"place": "Aundh", "note": None, "year": 2022, "rate": 3.0, "recorded": "2022-06-30T12:30:00"},
+        ])
+
+        columns = Table(self.frame, "columns").encode()
+        self.assertEqual(columns["columns"], list(self.frame.columns))
+        self.assertEqual(columns["rows"], 3)
+        self.assertEqual(columns["data"][3], [1.5, None, 3.0])
+
+        # strict JSON out of the renderer: null, never NaN
+        rendered = DatasetJSONRenderer().render({"table": Table(self.frame)})
+        self.assertNotIn(b"NaN", rendered)
+        self.assertEqual(json.loads(rendered)["table"], records)
+
+
+class DatasetSchemaTests(SimpleTestCase):
+    def test_column_fallback_order(self):
+        frame = pd.DataFrame({
+            "City": ["Pune"],
+            " Area Name ": ["Wakad"],
+            "avg rate": [1.0],
+            "Total Sales": [10],
+            "units (text)": ["n/a"],
+            "Demand Index": [2],
+            "Price": [3.0],
+            "year": [2020],
+        })
+        schema = DatasetSchema.resolve(frame)
+        # known names beat keyword matches, keyword matches must be numeric
+        self.assertEqual(
+            (schema.place, schema.demand, schema.price, schema.compare, schema.year),
+            (" Area Name ", "Demand Index", "Price", "Total Sales", "year"),
+        )
+        self.assertEqual(schema.search_columns, [" Area Name "])
+
+        # no demand keyword: any 'total' column; no known price name: any price/rate column
+        schema = DatasetSchema.resolve(frame.drop(columns=["Demand Index", "Price"]))
+        self.assertEqual((schema.demand, schema.price, schema.compare), ("Total Sales", "avg rate", "Total Sales"))
+
+        # nothing recognisable: first numeric column, and every text column is searched
+        schema = DatasetSchema.resolve(pd.DataFrame({"name": ["a"], "kind": ["b"], "score": [1.5], "n": [2]}))
+        self.assertEqual((schema.place, schema.demand, schema.price, schema.compare, schema.year), (None, "score", None, "score", None))
+        self.assertEqual((schema.search_columns, schema.listing_column), (["name", "kind"], "name"))
+
+
+class SeriesStoreTests(SimpleTestCase):
+    frame = pd.DataFrame({
+        "final location": ["Wakad", "Aundh", "Wakad", "Baner", "Wakad", "Aundh", "Wakad East", "Baner"],
+        "year": [2022, 2021, 2020, np.nan, 2021, 2020, 2023, 2020],
+        "total units": [5, np.nan, 3, 7, 4, 2, 1, 6],
+        "flat - weighted average rate": [9.5, 6.0, 8.0, 7.5, np.nan, 6.5, 9.0, 7.0],
+    })
+
+    @staticmethod
+    def legacy_points(frame, area, column):
+        """The request path the series store replaced: scan, sort_values, iterrows."""
+        ordered = _scan(frame, "final location", area).sort_values("year", kind="stable")
+        return [
+            {"year": int(r["year"]) if not pd.isna(r["year"]) else None,
+             "value": None if pd.isna(r[column]) else float(r[column])}
+            for _, r in ordered.iterrows()
+        ]
+
+    def test_matches_the_legacy_path(self):
+        ds = Dataset(self.frame, {"sha256": "0" * 64}, 0)
+        for area in ("wakad", "aundh", "baner", "a"):
+            for metric, column in ds.schema.metrics.items():
+                if column is None:
+                    continue
+                with self.subTest(area=area, metric=metric):
+                    self.assertEqual(ds.points(ds.index.match(area), metric), self.legacy_points(self.frame, area, column))
+
+
+class SnapshotTests(SimpleTestCase):
+    frame = pd.DataFrame({
+        "final location": ["Wakad", None, "Aundh"],
+        "zone": pd.Categorical(["west", "east", "west"]),
+        "year": [2020, 2021, 2022],
+        "rate": [1.5, np.nan, 3.0],
+        "recorded": pd.to_datetime(["2020-01-01 00:00", None, "2022-06-30 12:00"]),
+    })
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "sample.xlsx")
+            with open(source, "w") as f:
+                f.write("v1")
+            back = read_snapshot(write_snapshot(self.frame, source, source_fingerprint(source)))
+
+            self.assertEqual(back.columns.tolist(), self.frame.columns.tolist())
+            # text comes back dictionary-encoded, missing values included
+            self.assertIsInstance(back["final location"].dtype, pd.CategoricalDtype)
+            self.assertEqual(back["final location"].tolist()[::2], ["Wakad", "Aundh"])
+            self.assertTrue(pd.isna(back["final location"].iloc[1]))
+            self.assertEqual(back["zone"].tolist(), ["west", "east", "west"])
+            pd.testing.assert_series_equal(back["year"], self.frame["year"])
+            pd.testing.assert_series_equal(back["rate"], self.frame["rate"])
+            pd.testing.assert_series_equal(back["recorded"], self.frame["recorded"])
+
+    def test_reused_on_mtime_change_rebuilt_on_content_change(self):
+        reads = []
+
+        def reader(path):
+            reads.append(path)
+            return self.frame
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "sample.xlsx")
+            with open(source, "w") as f:
+                f.write("v1")
+            _, first = load_with_snapshot(source, reader)
+
+            st = os.stat(source)
+            os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+            frame, touched = load_with_snapshot(source, reader)
+            self.assertEqual(len(reads), 1)
+            self.assertEqual(touched["sha256"], first["sha256"])
+            self.assertNotEqual(touched["mtime_ns"], first["mtime_ns"])
+            self.assertEqual(frame["year"].tolist(), [2020, 2021, 2022])
+
+            with open(source, "w") as f:
+                f.write("v2")
+            _, changed = load_with_snapshot(source, reader)
+            self.assertEqual(len(reads), 2)
+            self.assertNotEqual(changed["sha256"], first["sha256"])
+            # the snapshot of the old content is dropped
+            self.assertEqual(sorted(os.listdir(os.path.join(tmp, ".snapshot"))), ["sample-" + changed["sha256"][:16], "sample.json"])
+
+
+class StoreDatasetTests(SimpleTestCase):
+    frame = pd.DataFrame({
+        "final location": ["Wakad", "Aundh", "Wakad", "Baner", "Wakad", "Aundh"],
+        "year": [2022, 2020, 2020, 2021, 2021, 2023],
+        "total units": [5, 1, 3, 7, 4, 2],
+        "flat - weighted average rate": [9.5, 6.0, 8.0, 7.5, 8.5, 6.5],
+    })
+
+    def test_matches_in_memory_dataset(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sample.csv")
+            self.frame.to_csv(path, index=False)
+            memory = Dataset(self.frame, {"sha256": "0" * 64}, 0)
+            stored = StoreDataset.load(path, chunk_rows=2)
+
+            self.assertEqual(stored.describe()["rows"], len(self.frame))
+            self.assertEqual(stored.places(), memory.places())
+            for area in ["wakad", "a", "baner"]:
+                with self.subTest(area=area):
+                    ids = stored.index.match(area)
+                    self.assertEqual(ids, memory.index.match(area))
+                    self.assertEqual(stored.points(ids, "demand"), memory.points(ids, "demand"))
+                    self.assertEqual(stored.history(ids, last_years=2)[0], memory.history(ids, last_years=2)[0])
+                    self.assertEqual(stored.rows(ids).values.tolist(), memory.rows(ids).values.tolist())
+
+            self.assertEqual(stored.rollups.locations, memory.rollups.locations)
+            for metric in ("demand", "price"):
+                np.testing.assert_allclose(stored.rollups.values[metric], memory.rollups.values[metric])
+
+            # export: same rows from both backends, chunked, projected and year-filtered
+            ids = memory.index.match("a")
+            exported = [
+                b"".join(export.encode(ds.row_chunks(ids, ["final location", "total units"], 2021, 2022, chunk_rows=2), "csv"))
+                for ds in (memory, stored)
+            ]
+            self.assertEqual(exported[0], exported[1])
+            self.assertEqual(exported[0].decode().splitlines(), ["final location,total units", "Wakad,5", "Baner,7", "Wakad,4"])
+            self.assertEqual(b"".join(export.encode(memory.row_chunks([], ["year"]), "csv")), b"year\n")
+
+            groups = [("wakad", stored.index.match("wakad")), ("a", stored.index.match("a")), ("baner", stored.index.match("baner"))]
+            aligned = memory.aligned(groups, "demand")
+            self.assertEqual(stored.aligned(groups, "demand"), aligned)
+            self.assertEqual(aligned["years"], [2020, 2021, 2022, 2023])
+            self.assertEqual(aligned["series"]["wakad"], [3.0, 4.0, 5.0, None])
+            self.assertEqual(aligned["series"]["a"], [4.0, 11.0, 5.0, 2.0])
+
+
+    def test_same_year_rows_come_back_in_source_order(self):
+        # enough ties for NumPy's default quicksort to reorder them
+        frame = pd.DataFrame({
+            "final location": [f"Wakad {i % 7}" for i in range(64)],
+            "year": [2020 + i % 3 for i in range(64)],
+            "total units": range(64),
+            "flat - weighted average rate": [float(i) for i in range(64)],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ties.csv")
+            frame.to_csv(path, index=False)
+            memory = Dataset(frame, {"sha256": "0" * 64}, 0)
+            stored = StoreDataset.load(path)
+            ids = memory.index.match("wakad")
+            expected = frame.sort_values("year", kind="stable")["total units"].tolist()
+            for ds in (memory, stored):
+                with self.subTest(backend=type(ds).__name__):
+                    self.assertEqual([p["value"] for p in ds.points(ids, "demand")], expected)
+                    self.assertEqual(ds.history(ids, with_rows=True)[1]["total units"].tolist(), expected)
+
+
+class ExportTests(SimpleTestCase):
+    frame = pd.DataFrame({
+        "final location": ["Wakad", "Aundh", "Wakad", "Baner"],
+        "year": [2020, 2020, 2021, 2021],
+        "total units": [5, 1, 3, 7],
+        # all missing in the first chunk: the sqlite backend reads that chunk as object, the next as float
+        "flat - weighted average rate": [None, None, 8.0, 7.5],
+        "note": [None, "new", "x", "3"],
+    })
+
+    @skipUnless(find_spec("pyarrow"), "pyarrow is not installed")
+    def test_arrow_and_parquet_round_trip(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        expected = {c: [None if pd.isna(v) else v for v in self.frame[c].tolist()] for c in self.frame.columns}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sample.csv")
+            self.frame.to_csv(path, index=False)
+            for ds in (Dataset(self.frame, {"sha256": "0" * 64}, 0), StoreDataset.load(path, chunk_rows=2)):
+                ids, kinds = ds.index.match("a"), ds.column_kinds()
+                arrow = b"".join(export.encode(ds.row_chunks(ids, chunk_rows=2), "arrow", kinds))
+                parquet = b"".join(export.encode(ds.row_chunks(ids, chunk_rows=2), "parquet", kinds))
+                for name, table in (("arrow", pa.ipc.open_stream(arrow).read_all()), ("parquet", pq.read_table(pa.BufferReader(parquet)))):
+                    with self.subTest(backend=type(ds).__name__, format=name):
+                        self.assertEqual(table.to_pydict(), expected)
+                        self.assertEqual(str(table.schema.field("year").type), "int64")
+
+    def test_endpoint_validates_and_suggests(self):
+        manager.wait_ready()
+        response = self.client.get("/api/export/", {"area": "budruk nagar"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["did_you_mean"], ["Ambegaon Budruk"])
+
+        for params in ({"columns": "year,nope"}, {"from_year": "soon"}, {"format": "xml"}):
+            with self.subTest(params=params):
+                response = self.client.get("/api/export/", dict(params, area="wakad"))
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+        response = self.client.get("/api/export/", {"area": "wakad", "columns": "year,total units", "from_year": 2022, "to_year": 2023})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content).decode().splitlines()[0], "year,total units")
+        self.assertIn("attachment", response["Content-Disposition"])
+
+
+class RollupsTests(SimpleTestCase):
+    def test_growth_and_rankings(self):
+        frame = StoreDatasetTests.frame
+        rollups = Rollups.from_frame(frame, "final location", "year", {"demand": "total units", "price": None})
+
+        self.assertEqual(rollups.locations, ["Aundh", "Baner", "Wakad"])
+        # Wakad: 3 -> 4 -> 5 units over 2020-2022
+        wakad = rollups.history("Wakad")
+        self.assertEqual(wakad["year"].tolist(), [2020, 2021, 2022])
+        self.assertAlmostEqual(wakad["demand yoy %"].iloc[1], 33.33)
+        self.assertAlmostEqual(rollups.cagr["demand"][rollups.position("Wakad")], (5 / 3) ** 0.5 * 100 - 100)
+        self.assertEqual(rollups.top("demand", "value", 2021, n=2), [(1, "Baner", 7.0), (2, "Wakad", 4.0)])
+        self.assertEqual(rollups.top("demand", "value", 2021, n=1, ascending=True), [(1, "Wakad", 4.0)])
+        # Aundh 1 -> 2 over three years (26%) trails Wakad (29%); Baner has one year only
+        self.assertEqual([loc for _, loc, _ in rollups.top("demand", "cagr")], ["Wakad", "Aundh"])
+
+    def test_rank_needs_at_least_one_area(self):
+        manager.wait_ready()
+        for query, status in (("top 0 areas by demand", 400), ("top 2 areas by demand", 200)):
+            with self.subTest(query=query):
+                response = self.client.post("/api/analyze/", {"query": query}, content_type="application/json")
+                self.assertEqual(response.status_code, status)
+
+
+class MetricsTests(SimpleTestCase):
+    def test_trace_feeds_histograms_by_stage_and_intent(self):
+        registry = metrics.Registry()
+        trace = metrics.Trace()
+        with trace.active():
+            trace.intent = "analyze"
+            trace.timings.append(("parse", 0.0002))
+            metrics.timed("lookup")(lambda: None)()
+        # finish() flushes into the module registry; render a private one to check the format
+        for stage, seconds in trace.timings:
+            registry.observe(stage, trace.intent, seconds)
+        registry.count_request(trace.intent, 200)
+        text = registry.render()
+        self.assertIn('analyze_stage_seconds_bucket{stage="parse",intent="analyze",le="0.00025"} 1', text)
+        self.assertIn('analyze_stage_seconds_bucket{stage="parse",intent="analyze",le="0.0001"} 0', text)
+        self.assertIn('analyze_stage_seconds_count{stage="lookup",intent="analyze"} 1', text)
+        self.assertIn('analyze_requests_total{intent="analyze",status="200"} 1', text)
+
+    def test_timed_is_a_no_op_without_a_trace(self):
+        self.assertEqual(metrics.timed("lookup")(lambda x: x + 1)(1), 2)
+
+    def test_concurrent_profiled_requests(self):
+        manager.wait_ready()
+        entered, release = threading.Event(), threading.Event()
+        answer = views._answer
+
+        def slow_answer(*args, **kwargs):
+            entered.set()
+            release.wait(5)
+            return answer(*args, **kwargs)
+
+        results = {}
+        with mock.patch.object(views, "_answer", side_effect=slow_answer):
+            first = threading.Thread(target=lambda: results.update(first=views.handle_analyze({"query": "help"}, profile=True)))
+            first.start()
+            entered.wait(5)
+            results["second"] = views.handle_analyze({"query": "help"}, profile=True)
+            release.set()
+            first.join(5)
+
+        payload, status = results["first"]
+        self.assertEqual((status, "functions" in payload["profile"]), (200, True))
+        self.assertEqual(results["second"][1], 409)
+        # the lock is released again
+        self.assertEqual(views.handle_analyze({"query": "help"}, profile=True)[1], 200)
+
+
+class SyntheticDatasetTests(SimpleTestCase):
+    def test_matches_the_bundled_schema(self):
+        real = read_source(EXCEL_PATH)
+        frame = synthetic.generate(locations=7, years=3)
+        self.assertEqual(list(frame.columns), list(real.columns))
+        self.assertEqual(frame.dtypes.tolist(), real.dtypes.tolist())
+        self.assertEqual(len(frame), 21)
+        self.assertEqual(frame["final location"].nunique(), 7)
+        pd.testing.assert_frame_equal(frame, synthetic.generate(locations=7, years=3))
@@ -1,6 +1,20 @@
+from django.conf import settings
 from django.urls import path
-from .views import analyze
+from .views import (
+    analyze, analyze_async, analyze_batch, analyze_page, cache_stats, dataset_reload, dataset_status, export_rows,
+    health, metrics_view, ready,
+)
 
 urlpatterns = [
-    path("analyze/", analyze, name="analyze"),
+    path("analyze/", analyze_async if settings.ANALYZE_ASYNC else analyze, name="analyze"),
+    path("analyze/async/", analyze_async, name="analyze-async"),
+    path("analyze/page/", analyze_page, name="analyze-page"),
+    path("analyze/batch/", analyze_batch, name="analyze-batch"),
+    path("export/", export_rows, name="export"),
+    path("cache/stats/", cache_stats, name="cache-stats"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("health/", health, name="health"),
+    path("ready/", ready, name="ready"),
+    path("dataset/", dataset_status, name="dataset-status"),
+    path("dataset/reload/", dataset_reload, name="dataset-reload"),
 ]
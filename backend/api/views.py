@@ -1,368 +1,537 @@
 # backend/api/views.py
+import asyncio
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponsePermanentRedirect, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 import pandas as pd
-import os
-import re
-
-# Path setup
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # backend/api -> backend
-DATASET_DIR = os.path.join(BASE_DIR, "dataset")
-EXCEL_PATH = os.path.join(DATASET_DIR, "realestate.xlsx")  # put your file here
-
-def load_dataset():
-    if not os.path.exists(EXCEL_PATH):
-        raise FileNotFoundError(f"Dataset not found at {EXCEL_PATH}. Put the excel file there.")
-    df = pd.read_excel(EXCEL_PATH, engine="openpyxl")
-    # Normalize column names: strip whitespace (but keep original case)
-    df.columns = [c.strip() for c in df.columns]
-    return df
-
-# Attempt to load on import
-try:
-    df = load_dataset()
-    load_error = None
-except Exception as e:
-    df = None
-    load_error = str(e)
+
+from . import handlers  # noqa: F401 -- registers the intent handlers
+from . import export, http_cache, intents, metrics, streaming
+from .cache import ResponseCache
+from .dataset import manager
+from .encoding import Table
+from .memory import process_memory
+from .paging import PageError, decode_cursor, page_options, paginate, result_sets
+from .renderers import DatasetJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# Load in the background so the worker boots (and answers health checks and
+# help) right away; later versions are swapped in by the watcher / reload endpoint.
+manager.start_warmup()
+manager.start_watching()
+
+STARTED = time.time()
+WARMUP_RETRY_AFTER = "2"
+
+response_cache = ResponseCache()
 
 
 def find_location_rows(area_query):
-    """Case-insensitive contains on 'final location' or sensible fallbacks."""
-    if df is None:
-        return pd.DataFrame()
-    # prefer known place columns
-    candidates = [c for c in df.columns if c.strip().lower() in ("final location", "final_location", "location", "area", "area name", "area_name")]
-    if candidates:
-        col = candidates[0]
-        return df[df[col].astype(str).str.contains(area_query, case=False, na=False)]
-    # fallback: search all object (string) columns
-    str_cols = [c for c in df.columns if df[c].dtype == object]
-    if not str_cols:
+    """Case-insensitive contains on 'final location' or sensible fallbacks (served from the location index)."""
+    ds = manager.current()
+    if ds is None:
         return pd.DataFrame()
-    mask = pd.Series(False, index=df.index)
-    for c in str_cols:
-        mask = mask | df[c].astype(str).str.contains(area_query, case=False, na=False)
-    return df[mask]
-
-
-def make_json_safe_series(series):
-    """Return list converting NaN -> None and numpy types to native Python types."""
-    out = []
-    for v in series.tolist():
-        if pd.isna(v):
-            out.append(None)
-        else:
-            # timestamps -> string; numpy numbers -> Python float
-            if isinstance(v, (pd.Timestamp,)):
-                out.append(str(v))
-            else:
-                try:
-                    if isinstance(v, (float, int)):
-                        out.append(float(v))
-                    else:
-                        out.append(v)
-                except Exception:
-                    out.append(v)
+    return ds.find_location_rows(area_query)
+
+
+def intent_key(intent, version):
+    return ResponseCache.make_key(version, intent.name, intent.args)
+
+
+def run_intent(intent, ds):
+    """Execute a parsed intent against ``ds``, serving repeated intents from the response cache."""
+    return response_cache.get_or_compute(intent_key(intent, ds.version), lambda: intents.dispatch(intent, ds))
+
+
+def with_table_format(payload, table_format):
+    """Copy of a (possibly cached) payload with its tables set to the requested format."""
+    return {k: Table(v.frame, table_format) if isinstance(v, Table) else v for k, v in payload.items()}
+
+
+def finalize_payload(payload, ds, table_format):
+    out = with_table_format(payload, table_format)
+    out["dataset_version"] = ds and ds.version
     return out
 
 
-@api_view(["POST"])
+def not_ready():
+    """``(payload, status)`` for requests that need the dataset before this worker has one."""
+    if manager.load_error is not None:
+        return {"error": f"Dataset not loaded yet, retrying: {manager.load_error}"}, 503
+    return {"error": "Dataset is warming up, retry shortly"}, 503
+
+
+def handle_analyze(data, trace=None, profile=False):
+    """
+    Validate an analyze request body and run it; returns ``(payload, status)``.
+
+    Stage timings go to ``trace`` (a fresh one if not given) and from there
+    to the metrics registry. With ``profile`` the response cache is bypassed,
+    tables are encoded inside the profiler and the payload gains a
+    ``profile`` breakdown; while another request is being profiled the
+    answer is a 409.
+    """
+    trace = trace or metrics.Trace()
+    with trace.active():
+        if profile:
+            try:
+                with metrics.profiled() as report, trace.stage("view"):
+                    payload, status = _answer(data, trace, profile=True)
+            except metrics.ProfilerBusy:
+                payload, status, profile = {"error": "Another request is being profiled, retry shortly"}, 409, False
+        else:
+            with trace.stage("view"):
+                payload, status = _answer(data, trace)
+    trace.finish(status)
+    if profile:
+        payload["profile"] = dict(report, stages_ms=trace.stages_ms())
+    return payload, status
+
+
+def _answer(data, trace, profile=False):
+    # one snapshot for the whole request, even if a reload lands meanwhile
+    ds = manager.current()
+
+    query_raw = data.get("query", "")
+    if not isinstance(query_raw, str):
+        return {"error": "Query must be a string"}, 400
+
+    if not query_raw.strip():
+        return {"error": "Query cannot be empty"}, 400
+
+    # "records" (list of row dicts, default) or "columns" (names + per-column arrays)
+    table_format = data.get("table_format", "records")
+
+    try:
+        paging = page_options(data)
+    except PageError as e:
+        return {"error": str(e)}, 400
+
+    with trace.stage("parse"):
+        intent = intents.parse(query_raw)
+    trace.intent = intent.name
+
+    if ds is None:
+        # still warming up: only intents that don't read the dataset can be answered
+        if intents.needs_data(intent.name):
+            return not_ready()
+        payload, status = intents.dispatch(intent, None)
+        return finalize_payload(payload, None, table_format), status
+
+    if profile:
+        # profile the real work, not a cache hit
+        payload, status = intents.dispatch(intent, ds)
+    else:
+        payload, status = run_intent(intent, ds)
+    if paging is not None:
+        # keep the full result so later pages are cut from it instead of re-running the query
+        result_sets.put(intent_key(intent, ds.version), (payload, status))
+        try:
+            with trace.stage("paginate"):
+                payload = paginate(payload, intent, ds.version, *paging, table_format)
+        except PageError as e:
+            return {"error": str(e)}, 400
+
+    payload = finalize_payload(payload, ds, table_format)
+    if profile:
+        with trace.stage("render"):
+            payload = {k: v.encode() if isinstance(v, Table) else v for k, v in payload.items()}
+    return payload, status
+
+
+def _get_request(request):
+    """
+    GET analyze (see :mod:`api.http_cache`): ``(early response, body, validators)``.
+
+    The early response is a redirect to the canonical URL or a 304 answered
+    without running the query. ``validators`` is ``(etag, last_modified)``,
+    or ``None`` when the answer must not be cached (profiling, no dataset).
+    """
+    body, canonical = http_cache.canonical_params(request.GET)
+    if parse_qsl(request.META.get("QUERY_STRING", ""), keep_blank_values=True) != parse_qsl(canonical):
+        return HttpResponsePermanentRedirect(f"{request.path}?{canonical}"), None, None
+    ds = manager.current()
+    if ds is None or request.GET.get("profile") == "1":
+        return None, body, None
+    etag, last_modified = http_cache.validators(ds, canonical)
+    response = http_cache.not_modified(request, etag, last_modified)
+    if response is not None:
+        metrics.registry.count_request("not_modified", response.status_code)
+        return http_cache.add_validators(response, etag, last_modified), None, None
+    return None, body, (etag, last_modified)
+
+
+def _with_cache_headers(request, response, validators, status):
+    if status == 503:
+        response["Retry-After"] = WARMUP_RETRY_AFTER
+    if request.method == "GET":
+        http_cache.add_validators(response, *(validators or (None, None)), cacheable=bool(validators) and status == 200)
+    return response
+
+
+@api_view(["GET", "POST"])
 def analyze(request):
     """
     POST JSON:
-      { "query": "Analyze Wakad" }
-    Response: JSON with summary, optional chart, table, compare, demand, etc.
+      { "query": "Analyze Wakad", "table_format": "records" | "columns",
+        "limit": 20, "offset": 0, "columns": ["year", "total units"] }   (paging keys optional)
+    Response: JSON with summary, optional chart, table, compare, demand, etc.;
+    with paging keys also ``table_page`` {total, offset, limit, columns, next_cursor}.
+
+    ``?profile=1`` (when settings.ANALYZE_PROFILING is on) adds a ``profile``
+    breakdown of this one request.
+
+    ``"stream": true`` answers with NDJSON instead (see :mod:`api.streaming`):
+    the summary and charts first, then the table rows in slices. Errors are
+    always plain JSON.
+
+    GET ``?q=Analyze+Wakad&limit=20&...`` takes the same keys as query
+    parameters and answers with ETag / Last-Modified / Cache-Control headers
+    (see :mod:`api.http_cache`).
+    """
+    validators = None
+    if request.method == "GET":
+        early, data, validators = _get_request(request)
+        if early is not None:
+            return early
+    else:
+        data = request.data
+    profile = request.query_params.get("profile") == "1"
+    if profile and not settings.ANALYZE_PROFILING:
+        return Response({"error": "Profiling is disabled on this server"}, status=403)
+    # the renderer reports the serialization time to this trace
+    request.analyze_trace = metrics.Trace()
+    payload, status = handle_analyze(data, request.analyze_trace, profile)
+    if status == 200 and _wants_stream(data):
+        response = _stream_response(streaming.ndjson_lines(payload, status, request.analyze_trace), status)
+    else:
+        response = Response(payload, status=status)
+    return _with_cache_headers(request, response, validators, status)
+
+
+def _wants_stream(data):
+    return isinstance(data, dict) and data.get("stream") is True
+
+
+def _stream_response(lines, status, content_type=streaming.CONTENT_TYPE):
+    response = StreamingHttpResponse(lines, content_type=content_type, status=status)
+    # ask nginx-style proxies to pass lines through as they are produced
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def run_batch(queries, ds, table_format):
     """
-    if load_error:
-        return Response({"error": f"Server dataset error: {load_error}"}, status=500)
+    Results for ``queries`` in order, one ``{"query", "status", ...payload}`` per item.
 
-    query_raw = request.data.get("query", "")
-    if not isinstance(query_raw, str):
-        return Response({"error": "Query must be a string"}, status=400)
-
-    query = query_raw.strip().lower()
-    if not query:
-        return Response({"error": "Query cannot be empty"}, status=400)
-
-    # --- Intent: list places ---
-    if ("list" in query and ("places" in query or "locations" in query)) or query in ("list places", "list locations"):
-        if df is None:
-            return Response({"error": "Dataset not loaded."}, status=500)
-        place_cols = [c for c in df.columns if c.strip().lower() in ("final location", "location", "area", "area name")]
-        if place_cols:
-            uniq = sorted(df[place_cols[0]].dropna().astype(str).unique().tolist())
+    All queries are parsed first; every distinct area is resolved against the
+    location index once up front and identical intents are executed once.
+    A failing item reports its own error without affecting the others.
+    """
+    parsed = [intents.parse(q) if isinstance(q, str) and q.strip() else None for q in queries]
+    for area in {a for intent in parsed if intent for a in intent.args if isinstance(a, str)}:
+        ds.index.match(area)
+
+    done = {}
+    results = []
+    for query, intent in zip(queries, parsed):
+        if intent is None:
+            payload, status = {"error": "Query must be a non-empty string"}, 400
+        elif intent in done:
+            payload, status = done[intent]
         else:
-            cols = [c for c in df.columns if df[c].dtype == object]
-            uniq = sorted(df[cols[0]].dropna().astype(str).unique().tolist()) if cols else []
-        return Response({"summary": f"Total {len(uniq)} locations found.", "places": uniq})
-
-    # --- Intent: help / what else ---
-    if "what else" in query or query in ("help", "options", "what can you do"):
-        examples = [
-            "Analyze Wakad",
-            "List places",
-            "Compare Ambegaon Budruk and Aundh",
-            "Compare Wakad and Hinjewadi demand",
-            "Show price growth for Akurdi over last 3 years",
-            "Show demand trend for Hinjewadi",
-        ]
-        return Response({"summary": "You can ask examples:", "examples": examples})
-
-    # ---- DEMAND TREND COMPARISON: "compare X and Y demand" ----
-    # place this BEFORE the generic compare to capture queries explicitly asking demand comparison
-    if "compare" in query and " and " in query and "demand" in query:
-        # remove 'demand' word then parse "compare X and Y"
-        cleaned = query.replace("demand", "").replace("compare", "").strip()
-        parts = [p.strip() for p in cleaned.split(" and ") if p.strip()]
-        if len(parts) < 2:
-            return Response({"error": "Could not parse the two locations to compare"}, status=400)
-
-        loc1, loc2 = parts[0], parts[1]
-        rows1 = find_location_rows(loc1)
-        rows2 = find_location_rows(loc2)
-        if rows1.empty or rows2.empty:
-            return Response({"error": f"Cannot find data for '{loc1}' or '{loc2}'"}, status=404)
-
-        # find demand-like numeric column
-        def find_demand_col(rows):
-            keywords = ["demand", "total units", "units", "supply", "launched"]
-            # try columns containing keywords and numeric
-            for col in rows.columns:
-                lname = col.lower()
-                if any(k in lname for k in keywords) and pd.api.types.is_numeric_dtype(rows[col]):
-                    return col
-            # fallback: any numeric column containing 'total'
-            for col in rows.columns:
-                if "total" in col.lower() and pd.api.types.is_numeric_dtype(rows[col]):
-                    return col
-            # last fallback: first numeric column
-            for col in rows.columns:
-                if pd.api.types.is_numeric_dtype(rows[col]):
-                    return col
-            return None
-
-        col1 = find_demand_col(rows1)
-        col2 = find_demand_col(rows2)
-        if col1 is None or col2 is None:
-            return Response({"error": "No numeric demand-like column found for one or both locations"}, status=500)
-
-        if "year" not in rows1.columns or "year" not in rows2.columns:
-            return Response({"error": "Dataset missing 'year' column for comparison"}, status=500)
-
-        t1 = rows1.sort_values("year")[[ "year", col1 ]]
-        t2 = rows2.sort_values("year")[[ "year", col2 ]]
-
-        demand_compare = {
-            loc1: [
-                {"year": int(r["year"]) if not pd.isna(r["year"]) else None,
-                 "value": None if pd.isna(r[col1]) else float(r[col1])}
-                for _, r in t1.iterrows()
-            ],
-            loc2: [
-                {"year": int(r["year"]) if not pd.isna(r["year"]) else None,
-                 "value": None if pd.isna(r[col2]) else float(r[col2])}
-                for _, r in t2.iterrows()
-            ]
-        }
+            try:
+                payload, status = run_intent(intent, ds)
+            except Exception:
+                logger.exception("Batch item failed: %r", query)
+                payload, status = {"error": "Internal error while answering this query"}, 500
+            done[intent] = payload, status
+        results.append(dict(with_table_format(payload, table_format), query=query, status=status))
+    return results
 
-        return Response({
-            "summary": f"Demand comparison between {loc1} and {loc2}.",
-            "demand_compare": demand_compare
-        })
-
-    # ---- Intent: general compare "Compare X and Y" ----
-    if "compare" in query and " and " in query:
-        cleaned = query.replace("compare", "").strip()
-        parts = [p.strip() for p in cleaned.split(" and ") if p.strip()]
-        if len(parts) >= 2:
-            a, b = parts[0], parts[1]
-            rows_a = find_location_rows(a)
-            rows_b = find_location_rows(b)
-            if rows_a.empty or rows_b.empty:
-                return Response({"error": f"One or both locations not found: '{a}', '{b}'"}, status=404)
-
-            # try find numeric column for trend
-            def find_numeric_col(r):
-                # prefer columns with 'total' or 'units'
-                for candidate in r.columns:
-                    lc = candidate.lower()
-                    if ("total" in lc or "unit" in lc) and pd.api.types.is_numeric_dtype(r[candidate]):
-                        return candidate
-                # fallback first numeric column
-                for c in r.columns:
-                    if pd.api.types.is_numeric_dtype(r[c]):
-                        return c
-                return None
-
-            col = find_numeric_col(rows_a)
-            def make_trend(rows, colname):
-                if colname and "year" in rows.columns and colname in rows.columns:
-                    tmp = rows.sort_values("year")[[ "year", colname ]]
-                    return [
-                        {"year": int(r["year"]) if not pd.isna(r["year"]) else None,
-                         "value": None if pd.isna(r[colname]) else float(r[colname])}
-                        for _, r in tmp.iterrows()
-                    ]
-                else:
-                    # fallback: head rows as records
-                    return rows.head(10).to_dict(orient="records")
-
-            return Response({
-                "summary": f"Comparison for '{a}' vs '{b}' (column used: {col})",
-                "compare": { a: make_trend(rows_a, col), b: make_trend(rows_b, col) }
-            })
-
-    # ------------------------------------------------------
-    # DEMAND TREND: "show demand trend for <area>"
-    # ------------------------------------------------------
-    if ("demand" in query and "trend" in query) or ("show demand" in query):
-        # Extract area name by removing keywords
-        area = query
-        for token in ["show", "demand", "trend", "for", "of"]:
-            area = area.replace(token, "")
-        area = area.strip()
-        if not area:
-            return Response({"error": "Cannot detect area for demand trend"}, status=400)
-
-        rows = find_location_rows(area)
-        if rows.empty:
-            return Response({"error": f"No data found for {area}"}, status=404)
-
-        # find demand-related numeric column
-        demand_col = None
-        keywords = ["demand", "total units", "units", "supply", "launched"]
-        for col in rows.columns:
-            if any(k in col.lower() for k in keywords) and pd.api.types.is_numeric_dtype(rows[col]):
-                demand_col = col
-                break
-        if demand_col is None:
-            # fallback: numeric column with 'total'
-            for col in rows.columns:
-                if "total" in col.lower() and pd.api.types.is_numeric_dtype(rows[col]):
-                    demand_col = col
-                    break
-        if demand_col is None:
-            # last fallback: first numeric column
-            for col in rows.columns:
-                if pd.api.types.is_numeric_dtype(rows[col]):
-                    demand_col = col
-                    break
-        if demand_col is None:
-            return Response({"error": "No numeric demand-related column found"}, status=500)
-
-        if "year" not in rows.columns:
-            return Response({"error": "Dataset missing 'year' column"}, status=500)
-
-        ordered = rows.sort_values("year")
-        trend = [
-            {"year": int(r["year"]) if not pd.isna(r["year"]) else None,
-             "value": None if pd.isna(r[demand_col]) else float(r[demand_col])}
-            for _, r in ordered.iterrows()
-        ]
 
-        return Response({
-            "summary": f"Demand trend for {area} using column '{demand_col}'.",
-            "demand": trend
-        })
-
-    # --- Intent: show price growth for <area> over last N years ---
-    if ("last" in query and "year" in query) or ("price growth" in query and "last" in query):
-        m = re.search(r"last\s+(\d+)\s+year", query)
-        years = int(m.group(1)) if m else 3
-
-        # extract area by removing keywords and numbers
-        area = query
-        for token in ["show", "price", "growth", "for", "over", "last", "years", str(years)]:
-            area = area.replace(token, "")
-        area = area.strip()
-        if not area:
-            return Response({"error": "Could not determine area from query"}, status=400)
-
-        rows = find_location_rows(area)
-        if rows.empty:
-            return Response({"error": f"No data found for {area}"}, status=404)
-        if "year" not in rows.columns:
-            return Response({"error": "Dataset has no 'year' column to compute last years"}, status=500)
-
-        max_year = int(rows["year"].max())
-        min_needed = max_year - years + 1
-        recent = rows[rows["year"] >= min_needed].sort_values("year")
-
-        # find a price column
-        price_col = None
-        for candidate in ["flat - weighted average rate", "flat weighted average rate", "price", "avg_price"]:
-            for c in recent.columns:
-                if c.lower().strip() == candidate:
-                    price_col = c
-                    break
-            if price_col:
-                break
-        # fallback: any numeric column with 'price' or 'rate'
-        if price_col is None:
-            for c in recent.columns:
-                if ("price" in c.lower() or "rate" in c.lower()) and pd.api.types.is_numeric_dtype(recent[c]):
-                    price_col = c
-                    break
-
-        chart = {}
-        chart["years"] = make_json_safe_series(recent["year"])
-        if price_col:
-            chart["prices"] = [None if pd.isna(x) else float(x) for x in recent[price_col].tolist()]
-        else:
-            chart["prices"] = [None] * len(chart["years"])
+@api_view(["POST"])
+def analyze_batch(request):
+    """
+    POST JSON:
+      { "queries": ["Analyze Wakad", "Analyze Aundh", ...], "table_format": "records" | "columns" }
+    Response: { "results": [ {query, status, ...same payload as /analyze/}, ... ], "dataset_version" }
+    """
+    ds = manager.current()
+    if ds is None:
+        payload, status = not_ready()
+        return Response(payload, status=status, headers={"Retry-After": WARMUP_RETRY_AFTER})
 
-        return Response({
-            "summary": f"Showing last {years} years price growth for {area}",
-            "chart": chart,
-            "table": recent.to_dict(orient="records")
-        })
-
-    # --- Default: Analyze <area> ---
-    if query.startswith("analyze"):
-        area = query.replace("analyze", "").strip()
-    else:
-        area = query.split()[-1]
-
-    if not area:
-        return Response({"error": "Could not determine area from query"}, status=400)
-
-    rows = find_location_rows(area)
-    if rows.empty:
-        return Response({"error": f"No data found for {area}"}, status=404)
-
-    # try to find price column
-    price_col = None
-    lower_cols = [c.lower() for c in rows.columns]
-    for candidate in ["flat - weighted average rate", "flat weighted average rate", "price", "avg_price"]:
-        for c in rows.columns:
-            if c.lower().strip() == candidate:
-                price_col = c
-                break
-        if price_col:
-            break
-    if price_col is None:
-        # fallback: any numeric column with 'price' or 'rate'
-        for c in rows.columns:
-            if ("price" in c.lower() or "rate" in c.lower()) and pd.api.types.is_numeric_dtype(rows[c]):
-                price_col = c
-                break
-
-    chart = {}
-    if "year" in rows.columns and price_col:
-        ordered = rows.sort_values("year")
-        chart = {
-            "years": make_json_safe_series(ordered["year"]),
-            "prices": [None if pd.isna(x) else float(x) for x in ordered[price_col].tolist()]
-        }
+    queries = request.data.get("queries")
+    if not isinstance(queries, list) or not queries:
+        return Response({"error": "'queries' must be a non-empty list"}, status=400)
+    if len(queries) > settings.ANALYZE_BATCH_LIMIT:
+        return Response({"error": f"At most {settings.ANALYZE_BATCH_LIMIT} queries per batch"}, status=400)
+
+    table_format = request.data.get("table_format", "records")
+    return Response({"results": run_batch(queries, ds, table_format), "dataset_version": ds.version})
+
+
+@api_view(["GET"])
+def analyze_page(request):
+    """
+    GET ?cursor=<next_cursor>[&limit=N][&table_format=columns]
+    Next page of a paginated analyze table, cut from the stored result set.
+    """
+    params = request.query_params
+    try:
+        version, name, args, offset, limit, columns = decode_cursor(params.get("cursor", ""))
+        if params.get("limit") is not None:
+            _, limit, _ = page_options({"limit": params["limit"]})
+        intent = intents.Intent(name, args)
+        key = intent_key(intent, version)
+        result = result_sets.get(key)
+        if result is None:
+            ds = manager.current()
+            if ds is None or ds.version != version or intent.name not in intents.registered():
+                return Response({"error": "Result set expired; run the query again"}, status=410)
+            try:
+                result = run_intent(intent, ds)
+            except Exception:
+                logger.exception("Re-running the intent of a page cursor failed: %r", intent)
+                raise PageError("Invalid cursor")
+            result_sets.put(key, result)
+        payload, status = result
+        table_format = params.get("table_format", "records")
+        page = paginate(payload, intent, version, offset, limit, columns, table_format)
+    except PageError as e:
+        return Response({"error": str(e)}, status=400)
+    out = {k: page[k] for k in ("table", "table_page") if k in page}
+    return Response(dict(out, dataset_version=version), status=status)
+
+
+# Async serving (ASGI): the pandas work and JSON rendering run on a bounded
+# thread pool so the event loop only parses requests and writes responses.
+_executor = ThreadPoolExecutor(max_workers=settings.ANALYZE_THREADS, thread_name_prefix="analyze")
+_pending = threading.BoundedSemaphore(settings.ANALYZE_MAX_PENDING)
+_renderer = DatasetJSONRenderer()
+
+
+def _json_response(payload, status):
+    return HttpResponse(_renderer.render(payload), content_type="application/json", status=status)
+
+
+def _analyze_rendered(data, profile):
+    trace = metrics.Trace()
+    payload, status = handle_analyze(data, trace, profile)
+    with trace.stage("render"):
+        return _renderer.render(payload), status
+
+
+async def _from_pool(lines):
+    """
+    Async iterator over a sync line generator, each slice encoded on the
+    analyze pool. Holds the request's ``_pending`` permit until the stream
+    ends or is closed, so streamed encoding counts against the limit too.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        while (line := await loop.run_in_executor(_executor, next, lines, None)) is not None:
+            yield line
+    finally:
+        _pending.release()
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+async def analyze_async(request):
+    """
+    Async twin of ``analyze`` with the same request/response contract.
+
+    Requests beyond ANALYZE_MAX_PENDING in flight get a 503 instead of
+    queueing without bound behind the pool.
+    """
+    validators = None
+    if request.method == "GET":
+        # no pandas work here: canonical-URL check and validators only
+        early, data, validators = _get_request(request)
+        if early is not None:
+            return early
     else:
-        chart = {"years": make_json_safe_series(rows["year"]) if "year" in rows.columns else [], "prices": []}
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return _json_response({"error": "Request body must be JSON"}, 400)
+        if not isinstance(data, dict):
+            return _json_response({"error": "Request body must be a JSON object"}, 400)
+    profile = request.GET.get("profile") == "1"
+    if profile and not settings.ANALYZE_PROFILING:
+        return _json_response({"error": "Profiling is disabled on this server"}, 403)
+
+    if not _pending.acquire(blocking=False):
+        response = _json_response({"error": "Server busy, retry shortly"}, 503)
+        response["Retry-After"] = "1"
+        return response
+    streaming_permit = False
+    try:
+        loop = asyncio.get_running_loop()
+        if _wants_stream(data):
+            trace = metrics.Trace()
+            payload, status = await loop.run_in_executor(_executor, handle_analyze, data, trace, profile)
+            if status != 200:
+                response = _json_response(payload, status)
+            else:
+                # the stream releases the permit once its last slice is encoded
+                response = _stream_response(_from_pool(streaming.ndjson_lines(payload, status, trace)), status)
+                streaming_permit = True
+        else:
+            content, status = await loop.run_in_executor(_executor, _analyze_rendered, data, profile)
+            response = HttpResponse(content, content_type="application/json", status=status)
+    finally:
+        if not streaming_permit:
+            _pending.release()
+    return _with_cache_headers(request, response, validators, status)
+
 
-    table = rows.to_dict(orient="records")
+@require_http_methods(["GET"])
+def export_rows(request):
+    """
+    GET ?area=wakad&format=csv|arrow|parquet&columns=year,total units&from_year=2020&to_year=2023
 
+    Streams the rows matching ``area`` (same matching as analyze, including
+    the fuzzy fallback; all rows when omitted) as a file download, see
+    :mod:`api.export`. A plain Django view: DRF would treat ``format`` as
+    its renderer override.
+    """
+    ds = manager.current()
+    if ds is None:
+        response = _json_response(*not_ready())
+        response["Retry-After"] = WARMUP_RETRY_AFTER
+        return response
+    params = request.GET
+    try:
+        fmt, columns, min_year, max_year = export.export_options(params, ds)
+    except export.ExportError as e:
+        return _json_response({"error": str(e)}, e.status)
+
+    area = params.get("area", "").strip()
+    ids, fuzzy = ds.index.resolve(area)
+    if not ids:
+        payload = {"error": f"No data found for {area}"}
+        suggestions = ds.index.suggestions(area)
+        if suggestions:
+            payload["did_you_mean"] = suggestions
+        return _json_response(payload, 404)
+
+    metrics.registry.count_request("export", 200)
+    chunks = ds.row_chunks(ids, columns, min_year, max_year, chunk_rows=export.CHUNK_ROWS)
+    content_type, extension = export.FORMATS[fmt]
+    response = _stream_response(export.encode(chunks, fmt, ds.column_kinds(columns)), 200, content_type)
+    name = ds.index.names[fuzzy[0]] if fuzzy else (area or "all")
+    filename = "".join(c if c.isalnum() else "-" for c in name.lower())
+    response["Content-Disposition"] = f'attachment; filename="{filename}-{ds.version}.{extension}"'
+    response["X-Dataset-Version"] = ds.version
+    return response
+
+
+def metrics_view(request):
+    """Per-stage latency histograms and request counters of this worker, in Prometheus text format."""
+    cache = response_cache.stats()
+    counters = {
+        "analyze_cache_events_total": (
+            "Response cache lookups and stores, by outcome.",
+            {k: cache[k] for k in ("local_hits", "shared_hits", "misses", "stores", "skipped")},
+        ),
+        "analyze_singleflight_events_total": (
+            "Analyze computations led, and identical concurrent requests that shared one (in or across workers).",
+            {k: cache["singleflight"][k] for k in ("leaders", "coalesced", "lock_waits", "worker_coalesced")},
+        ),
+    }
+    return HttpResponse(metrics.registry.render(counters), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@api_view(["GET"])
+def cache_stats(request):
+    """Hit/miss counters of this worker's response cache."""
+    ds = manager.current()
+    return Response(dict(response_cache.stats(), dataset_version=ds and ds.version))
+
+
+def _reload_allowed(request):
+    token = settings.DATASET_RELOAD_TOKEN
+    if not token:
+        return settings.DEBUG
+    return hmac.compare_digest(request.headers.get("X-Reload-Token", ""), token)
+
+
+@api_view(["GET"])
+def health(request):
+    """Liveness: the worker is up and serving requests, dataset or not."""
+    return Response({"status": "ok", "pid": os.getpid(), "uptime_seconds": round(time.time() - STARTED, 1)})
+
+
+@api_view(["GET"])
+def ready(request):
+    """
+    Readiness: 200 once this worker has a dataset live (indexes and rollups
+    are built as part of the load), 503 with the warmup state until then.
+    """
+    ds = manager.current()
+    out = manager.readiness()
+    if ds is None:
+        return Response(dict(out, ready=False), status=503, headers={"Retry-After": WARMUP_RETRY_AFTER})
+    info = ds.describe()
+    return Response(dict(
+        out,
+        ready=True,
+        version=ds.version,
+        rows=info["rows"],
+        load_seconds=info["load_seconds"],
+        indexes={"locations": info["locations"], "rollups": ds.rollups is not None},
+    ))
+
+
+@api_view(["GET"])
+def dataset_status(request):
+    """Version and load details of the dataset this worker is serving, plus the worker's memory."""
+    ds = manager.current()
     return Response({
-        "summary": f"Here is a quick analysis for {area}. Found {len(rows)} matching records.",
-        "chart": chart,
-        "table": table
+        "dataset": ds and ds.describe(),
+        "reloading": manager.reloading,
+        "last_error": manager.load_error,
+        "worker": {"pid": os.getpid(), "memory": process_memory()},
     })
- 
\ No newline at end of file
+
+
+@api_view(["POST"])
+def dataset_reload(request):
+    """
+    Rebuild the dataset and its indexes in the background and swap them in.
+
+    Requires the X-Reload-Token header (settings.DATASET_RELOAD_TOKEN); without
+    a configured token the endpoint only works with DEBUG on. Pass
+    {"wait": true} to block until the new version is live. Only the worker
+    that receives the call reloads; the others pick the change up via the
+    file watcher.
+    """
+    if not _reload_allowed(request):
+        return Response({"error": "Reload not permitted"}, status=403)
+    force = bool(request.data.get("force", False))
+    if request.data.get("wait"):
+        swapped = manager.reload(force=force)
+        ds = manager.current()
+        return Response({
+            "reloaded": bool(swapped),
+            "dataset": ds and ds.describe(),
+            "last_error": manager.load_error,
+        }, status=200 if manager.load_error is None else 500)
+    manager.reload_in_background(force=force)
+    return Response({"status": "reloading"}, status=202)
@@ -0,0 +1,41 @@
+# backend/gunicorn.conf.py
+"""
+Gunicorn settings for sharing one dataset across workers.
+
+``preload_app`` imports the app and waits for the dataset warmup (load and
+index build) once in the master; workers are forked from it and share those
+pages copy-on-write. The mapped snapshot keeps the data itself in NumPy
+buffers, which stay shared. ``gc.freeze()`` before each fork moves the
+master's objects out of the collector's reach, so a worker's collections
+don't write to (and thereby copy) the inherited pages.
+
+Check the effect with ``python manage.py memory_report <master pid>``.
+"""
+import gc
+import os
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+
+def on_starting(server):
+    # no collections while the app is imported: nothing gets moved around before the freeze
+    gc.disable()
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        # Django imports URLconfs (and with them api.views, which starts the
+        # dataset warmup) on the first request; do it here and wait for the
+        # load before the workers fork. If it fails, each worker retries itself.
+        from django.urls import get_resolver
+        get_resolver().url_patterns
+        from api.dataset import manager
+        manager.wait_ready()
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
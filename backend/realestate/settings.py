@@ -129,6 +129,54 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Response cache for /api/analyze/ (see api/cache.py). The local tier is an
+# in-process LRU of ANALYZE_CACHE_SIZE entries; set ANALYZE_SHARED_CACHE_DIR to let gunicorn workers share
+# entries through a file cache. ANALYZE_CACHE_SIZE=0 disables caching.
+ANALYZE_CACHE_SIZE = int(os.environ.get('ANALYZE_CACHE_SIZE', '256'))
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+if ANALYZE_CACHE_SIZE > 0 and os.environ.get('ANALYZE_SHARED_CACHE_DIR'):
+    CACHES['analyze_shared'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['ANALYZE_SHARED_CACHE_DIR'],
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': ANALYZE_CACHE_SIZE * 4},
+    }
+    # lock files that make concurrent identical questions compute once across workers
+    ANALYZE_LOCK_DIR = os.environ.get('ANALYZE_LOCK_DIR', os.path.join(os.environ['ANALYZE_SHARED_CACHE_DIR'], '.locks'))
+
+# Token required in the X-Reload-Token header of POST /api/dataset/reload/.
+# When unset, the endpoint is only available with DEBUG on.
+DATASET_RELOAD_TOKEN = os.environ.get('DATASET_RELOAD_TOKEN', '')
+
+# ASGI serving: ANALYZE_ASYNC=1 routes /api/analyze/ to the async view
+# (always reachable at /api/analyze/async/). ANALYZE_THREADS bounds the pool
+# running the pandas work; requests beyond ANALYZE_MAX_PENDING get a 503.
+ANALYZE_ASYNC = os.environ.get('ANALYZE_ASYNC', '0') == '1'
+ANALYZE_THREADS = int(os.environ.get('ANALYZE_THREADS', str(min(4, os.cpu_count() or 1))))
+ANALYZE_MAX_PENDING = int(os.environ.get('ANALYZE_MAX_PENDING', '256'))
+
+# Maximum number of queries accepted by POST /api/analyze/batch/.
+ANALYZE_BATCH_LIMIT = int(os.environ.get('ANALYZE_BATCH_LIMIT', '100'))
+
+# Cache-Control max-age (seconds) of GET /api/analyze/ answers; clients revalidate
+# with If-None-Match afterwards and get a 304 while the dataset is unchanged.
+ANALYZE_HTTP_MAX_AGE = int(os.environ.get('ANALYZE_HTTP_MAX_AGE', '60'))
+
+# ?profile=1 on the analyze endpoints (cProfile breakdown of one request); on by default only with DEBUG
+ANALYZE_PROFILING = os.environ.get('ANALYZE_PROFILING', '1' if DEBUG else '0') == '1'
+
+REST_FRAMEWORK = {
+    # tables are encoded lazily and vectorized by the dataset renderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.DatasetJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
 # STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = []
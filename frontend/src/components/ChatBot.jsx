@@ -12,6 +12,12 @@ import InteractiveMenu from "./InteractiveMenu.jsx";
 
 const BACKEND_URL = "https://sigmabot-dke5.onrender.com/api/analyze/" || "http://127.0.0.1:8000/api/analyze/";
 
+// Same steps as the server's intents.normalize(): trim both ends, lowercase,
+// collapse whitespace, drop trailing punctuation. Any difference costs a 301
+// to the canonical URL, which browsers then cache.
+const canonicalQuery = (text) =>
+  text.trim().toLowerCase().replace(/\s+/g, " ").replace(/[\s?!.,;:]+$/, "");
+
 export default function ChatBot() {
   const [query, setQuery] = useState("");
   const [messages, setMessages] = useState([]);
@@ -48,20 +54,24 @@ export default function ChatBot() {
     setDemandData(null);
 
     try {
-      const res = await fetch(BACKEND_URL, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ query: text }),
-      });
+      // GET on the canonical URL (normalized query, sorted keys) so the browser
+      // and any proxy can cache answers and revalidate them with the ETag
+      const params = new URLSearchParams({ limit: "20", q: canonicalQuery(text), table_format: "columns" });
+      const res = await fetch(`${BACKEND_URL}?${params}`);
 
       const data = await res.json();
 
-      // Add bot text reply
+      // Add bot text reply (with the fuzzy-match hints, if any)
+      let reply = data.summary || data.error || "Response received.";
+      if (data.corrections) {
+        reply += " (" + data.corrections.map((c) => `"${c.query}" matched ${c.location}`).join(", ") + ")";
+      }
+      if (data.did_you_mean) reply += ` Did you mean: ${data.did_you_mean.join(", ")}?`;
       setMessages((prev) => [
         ...prev,
         {
           from: "bot",
-          text: data.summary || data.error || "Response received.",
+          text: reply,
         },
       ]);
 
@@ -74,9 +84,10 @@ export default function ChatBot() {
         setChartData(merged);
       }
 
-      if (data.table) setTableData(data.table);
+      if (data.table) setTableData({ table: data.table, page: data.table_page });
       if (data.places) setPlaces(data.places);
-      if (data.compare) setCompareData(data.compare);
+      // compare and demand_compare: every area on one shared year axis
+      if (data.aligned) setCompareData(data.aligned);
       if (data.demand) setDemandData(data.demand);
     } catch (err) {
       setMessages((prev) => [
@@ -102,7 +113,7 @@ export default function ChatBot() {
           <h1 className="text-xl font-semibold">SigmaChatBot</h1>
           <p className="text-gray-600 text-sm">
             Ask anything like <code>Analyze Wakad</code> or{" "}
-            <code>Compare Wakad and Aundh</code>
+            <code>Compare Wakad, Aundh and Akurdi</code>
           </p>
         </div>
 
@@ -148,7 +159,7 @@ export default function ChatBot() {
       {/* RIGHT RESULT PANEL */}
       <div className="w-1/2 bg-white shadow rounded-xl border p-5 space-y-6 h-[680px] overflow-y-auto">
         {chartData && <PriceChart data={chartData} />}
-        {tableData && <DataTable data={tableData} />}
+        {tableData && <DataTable data={tableData.table} page={tableData.page} />}
 
         {places && (
           <PlacesList
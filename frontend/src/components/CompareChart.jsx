@@ -11,23 +11,33 @@ import {
   Legend,
 } from "recharts";
 
+const COLORS = [
+  "#3b82f6",
+  "#ef4444",
+  "#10b981",
+  "#f59e0b",
+  "#8b5cf6",
+  "#ec4899",
+  "#14b8a6",
+  "#f97316",
+  "#6366f1",
+  "#84cc16",
+  "#06b6d4",
+  "#a855f7",
+];
+
 export default function CompareChart({ data }) {
-  // Data = { location1: [...], location2: [...] }
-  const locations = Object.keys(data);
+  // Data = { years: [...], series: { location: [value per year], ... } }
+  const locations = Object.keys(data.series || {});
   if (locations.length < 2) return null;
 
-  const loc1 = locations[0];
-  const loc2 = locations[1];
-
-  // Normalize structure for recharts
-  const combined = [];
-
-  data[loc1].forEach((item, i) => {
-    combined.push({
-      year: item.year,
-      [loc1]: item.value,
-      [loc2]: data[loc2][i] ? data[loc2][i].value : null,
+  // Normalize structure for recharts: one point per year, one key per location
+  const combined = data.years.map((year, i) => {
+    const point = { year };
+    locations.forEach((loc) => {
+      point[loc] = data.series[loc][i];
     });
+    return point;
   });
 
   return (
@@ -42,8 +52,16 @@ export default function CompareChart({ data }) {
             <Tooltip />
             <Legend />
 
-            <Line dataKey={loc1} stroke="#3b82f6" strokeWidth={2} dot={false} />
-            <Line dataKey={loc2} stroke="#ef4444" strokeWidth={2} dot={false} />
+            {locations.map((loc, i) => (
+              <Line
+                key={loc}
+                dataKey={loc}
+                stroke={COLORS[i % COLORS.length]}
+                strokeWidth={2}
+                dot={false}
+                connectNulls
+              />
+            ))}
           </LineChart>
         </ResponsiveContainer>
       </div>
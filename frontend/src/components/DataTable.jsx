@@ -1,12 +1,31 @@
 // src/components/DataTable.jsx
 import React from "react";
 
-export default function DataTable({ data }) {
-  if (!data || data.length === 0) return null;
-  const cols = Object.keys(data[0]);
+// Accepts either a list of row objects or the column-oriented
+// { columns: [...], data: [[...col0], [...col1], ...], rows } payload.
+function toRows(data, limit) {
+  if (Array.isArray(data)) {
+    return { cols: data.length ? Object.keys(data[0]) : [], rows: data.slice(0, limit) };
+  }
+  const n = Math.min(data.rows ?? (data.data[0] || []).length, limit);
+  const rows = [];
+  for (let i = 0; i < n; i++) {
+    const row = {};
+    data.columns.forEach((c, j) => { row[c] = data.data[j][i]; });
+    rows.push(row);
+  }
+  return { cols: data.columns, rows };
+}
+
+export default function DataTable({ data, page }) {
+  if (!data) return null;
+  const { cols, rows } = toRows(data, 20);
+  if (rows.length === 0) return null;
   return (
     <div>
-      <h3 className="text-lg font-medium mb-2">Table (first 20 rows)</h3>
+      <h3 className="text-lg font-medium mb-2">
+        Table (first {rows.length}{page ? ` of ${page.total}` : ""} rows)
+      </h3>
       <div className="overflow-x-auto">
         <table className="w-full text-sm border-collapse">
           <thead>
@@ -15,7 +34,7 @@ export default function DataTable({ data }) {
             </tr>
           </thead>
           <tbody>
-            {data.slice(0,20).map((row, i) => (
+            {rows.map((row, i) => (
               <tr key={i} className="odd:bg-white even:bg-gray-50">
                 {cols.map((c) => <td key={c} className="p-2 align-top">{String(row[c] ?? "")}</td>)}
               </tr>
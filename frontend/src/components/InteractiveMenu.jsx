@@ -5,7 +5,9 @@ const actions = [
   { label: "Analyze Location", query: "Analyze ", icon: "📊" },
   { label: "Show Demand Trend", query: "Show demand trend for ", icon: "📉" },
   { label: "Show Price Growth", query: "Show price growth for ", icon: "📈" },
-  { label: "Compare Two Locations", query: "Compare ", icon: "⚖️" },
+  { label: "Compare Locations", query: "Compare ", icon: "⚖️" },
+  { label: "Top Areas by Growth", query: "Top 10 areas by price growth", icon: "🏆" },
+  { label: "YoY Change", query: "YoY change for ", icon: "🔁" },
   { label: "List All Places", query: "List places", icon: "🗺️" },
   { label: "Help / What Else", query: "What else", icon: "❓" },
 ];